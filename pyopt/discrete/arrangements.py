@@ -0,0 +1,123 @@
+__author__ = "Alex Baranov"
+
+import math
+import itertools as it
+import numpy as np
+from combinatorial_set import CombinatorialSet
+from localsearch import NEIGHBORHOODS
+
+
+class ArrangementSet(CombinatorialSet):
+    """
+    Describes the set of arrangements: the ordered selections (x_1, ..., x_k) of k different elements
+    of the n generation elements. The set has n! / (n-k)! elements.
+    The local search moves change the order of the selected elements only.
+    """
+    neighborhoods = NEIGHBORHOODS
+
+    def __init__(self, s=(), k=None):
+        """
+        Creates instance of the ArrangementSet class.
+
+        Parameters:
+         - s - the generation elements
+         - k - the number of the selected elements (default - None, all the elements are selected)
+        """
+        super(ArrangementSet, self).__init__(s)
+        self.k = len(self.generation_elements) if k is None else k
+        if not 0 <= self.k <= len(self.generation_elements):
+            raise ValueError("The arrangements size should be in the range [0, {0}]".format(
+                len(self.generation_elements)))
+
+    def __iter__(self):
+        for x in it.permutations(self.generation_elements, self.k):
+            yield x
+
+    def get_size(self):
+        """
+        Gets the number of the arrangements n! / (n-k)!.
+        """
+        n = len(self.generation_elements)
+        return math.factorial(n) // math.factorial(n - self.k)
+
+    def find_min_of_linear_function(self, coefs):
+        """
+        Gets the minimum of the linear function on the given set.
+
+        Parameters:
+         - coefs - the coefficients (c_1, ..., c_k) of the linear function of type F(x) = sum(c_i*x_i)
+        """
+        return self.find_min_of_linear_functions([coefs])[0].tolist()
+
+    def find_min_of_linear_functions(self, coefs):
+        """
+        Gets the minimums of the linear functions on the given set at once.
+        The positive coefs take the least elements and the negative ones take the greatest elements,
+        the greater coef takes the less element.
+
+        Parameters:
+         - coefs - the (m x k) array, each row is the coefficients of the linear function
+
+        Returns the (m x k) array of the arrangements.
+        """
+        coefs = np.asarray(coefs)
+        n = len(self.generation_elements)
+        rows = np.arange(len(coefs))[:, np.newaxis]
+
+        # the stable sort keeps the order of the equal coefs as PermutationSet does
+        keys = np.argsort(-coefs, axis=1, kind="mergesort")
+        positions = np.arange(self.k)
+        indexes = np.where(coefs[rows, keys] < 0, n - self.k + positions, positions)
+
+        result = np.empty(keys.shape, dtype=np.array(self.generation_elements).dtype)
+        result[rows, keys] = np.array(self.generation_elements)[indexes]
+        return result
+
+    def find_nearest_set_point(self, p):
+        """
+        Gets the nearest set point related to the given point 'p'
+
+        Parameters:
+         - p - some point in the space
+        """
+        return self.find_nearest_set_points([p])[0].tolist()
+
+    def find_nearest_set_points(self, points):
+        """
+        Gets the nearest set points related to the given points at once.
+        Unlike the permutations the sum of the squares of the arrangement elements is not constant, so the nearest
+        point is not the minimum of the linear function. The sorted coordinates take the increasing elements,
+        the elements are chosen by the dynamic programming in O(nk) operations.
+
+        Parameters:
+         - points - the (m x k) array of the points in the space
+
+        Returns the (m x k) array of the arrangements.
+        """
+        points = np.asarray(points, dtype=float)
+        elements = np.array(self.generation_elements)
+        rows = np.arange(len(points))
+
+        order = np.argsort(points, axis=1, kind="mergesort")
+        sorted_points = points[rows[:, np.newaxis], order]
+
+        # costs[i, :, j] is the least distance of the i + 1 least coordinates if the i-th of them takes
+        # the j-th element and the less coordinates take the less elements
+        costs = np.empty((self.k, len(points), len(elements)))
+        best = np.zeros((len(points), len(elements) + 1))
+        for i in xrange(self.k):
+            costs[i] = best[:, :-1] + (elements[np.newaxis, :] - sorted_points[:, i, np.newaxis]) ** 2
+            costs[i, :, :i] = np.inf
+            best = np.hstack((np.full((len(points), 1), np.inf), np.minimum.accumulate(costs[i], axis=1)))
+
+        # the elements are restored from the greatest coordinate
+        indexes = np.empty((len(points), self.k), dtype=int)
+        bound = np.full(len(points), len(elements))
+        for i in reversed(xrange(self.k)):
+            masked = np.where(np.arange(len(elements)) < bound[:, np.newaxis], costs[i], np.inf)
+            bound = np.argmin(masked, axis=1)
+            indexes[:, i] = bound
+
+        result = np.empty((len(points), self.k), dtype=elements.dtype)
+        result[rows[:, np.newaxis], order] = elements[indexes]
+        return result
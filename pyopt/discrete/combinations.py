@@ -0,0 +1,34 @@
+__author__ = "Alex Baranov"
+
+from multiset_permutations import MultisetPermutationSet
+
+
+class CombinationSet(MultisetPermutationSet):
+    """
+    Describes the set of combinations: the subsets of k elements of the given elements.
+    The subset is given by the incidence vector x: x_i = 1 if the i-th of the sorted elements is in the subset,
+    otherwise x_i = 0. The incidence vectors are the permutations of the multiset of n - k zeros and k ones,
+    so the minimum of the linear function takes the k least coefs and the nearest point takes the k greatest
+    coordinates.
+    """
+    def __init__(self, s=(), k=0):
+        """
+        Creates instance of the CombinationSet class.
+
+        Parameters:
+         - s - the elements
+         - k - the number of the elements in the subsets
+        """
+        elements = sorted(s)
+        if not 0 <= k <= len(elements):
+            raise ValueError("The subsets size should be in the range [0, {0}]".format(len(elements)))
+
+        super(CombinationSet, self).__init__([0] * (len(elements) - k) + [1] * k)
+        self.elements = elements
+        self.k = k
+
+    def get_subset(self, point):
+        """
+        Gets the elements of the subset given by the incidence vector.
+        """
+        return [element for element, x in zip(self.elements, point) if x]
@@ -1,17 +1,50 @@
 __author__ = "Alex Baranov"
 
+import sys
+import itertools as it
+import numpy as np
+import localsearch
+
+class SizeOverflowError(OverflowError, TypeError):
+    """
+    Raised by len() of the set which size does not fit in the int. It is the TypeError as well,
+    so the length hints of list(), zip() and map() ignore it and the large set is just iterated.
+    """
+
 
 class CombinatorialSet(object):
     """
     Contains the base definition of the set. Defines methods that should be impelemented for the specific sets.
     """
 
+    # the local search moves (see localsearch.NEIGHBORHOODS) that keep the points in the set
+    neighborhoods = ()
+
     def __init__(self, s=()):
         self.generation_elements = sorted(s)
 
     def __iter__(self):
         raise NotImplementedError
 
+    def __len__(self):
+        """
+        Gets the number of the set points. Raises SizeOverflowError (the OverflowError) if the number
+        does not fit in the int, use get_size() then.
+        """
+        size = self.get_size()
+        if size > sys.maxsize:
+            raise SizeOverflowError("The set size {0} does not fit in the int, use get_size()".format(size))
+        return size
+
+    def __nonzero__(self):
+        return self.get_size() > 0
+
+    def get_size(self):
+        """
+        Gets the number of the set points as the set iterator gives them.
+        """
+        raise NotImplementedError
+
     def find_nearest_set_point(self, p):
         """
         Gets the set point that is the closest one to the provided point 'p'.
@@ -23,3 +56,50 @@ class CombinatorialSet(object):
         Gets the minimum of the linear function on a given set.
         """
         raise NotImplementedError
+
+    def find_nearest_set_points(self, points):
+        """
+        Gets the closest set points to the provided points (rows of the (k x n) array).
+        Returns the (k x n) array of the set points.
+        """
+        points = np.asarray(points)
+        return np.array([self.find_nearest_set_point(p) for p in points]).reshape(len(points), -1)
+
+    def find_min_of_linear_functions(self, coefs):
+        """
+        Gets the minimums of the linear functions on a given set.
+        The coefs of the functions are the rows of the (k x n) array. Returns the (k x n) array of the set points.
+        """
+        coefs = np.asarray(coefs)
+        return np.array([self.find_min_of_linear_function(c) for c in coefs]).reshape(len(coefs), -1)
+
+    def get_neighbors(self, point):
+        """
+        Gets the set points made from the set point by one move as the (k x n) array.
+        The base implementation makes the local search moves of the 'neighborhoods' attribute.
+        """
+        if not self.neighborhoods:
+            raise NotImplementedError
+        return localsearch.get_neighbors(point, self.neighborhoods)
+
+    def get_prefixes(self, count):
+        """
+        Gets the prefixes that split the set into at least 'count' parts for the separate enumeration
+        (see iterate_blocks). The base implementation does not split the set.
+        """
+        return [None]
+
+    def iterate_blocks(self, block_size, prefix=None):
+        """
+        Iterates the set elements by the (k x n) arrays (k <= block_size) in the same order as the set iterator does.
+
+        Parameters:
+         - block_size - the maximal number of the elements in the block
+         - prefix - the prefix of the iterated elements returned by get_prefixes (default - None, all the elements)
+        """
+        elements = iter(self)
+        while True:
+            block = list(it.islice(elements, block_size))
+            if not block:
+                return
+            yield np.array(block)
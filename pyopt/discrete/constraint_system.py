@@ -0,0 +1,137 @@
+__author__ = "Alex Baranov"
+
+import numpy as np
+
+
+class ConstraintSystem(object):
+    """
+    The system of the linear constraints of type a_1*x_1 + ... + a_n*x_n + b <= 0.
+    The coefs A and the free terms b are stored once as the contiguous arrays, so many points
+    can be checked with one matrix product. The rows (cuts) are appended in place.
+    """
+
+    def __init__(self, system=(), variables_count=None):
+        """
+        Creates instance of the ConstraintSystem class.
+
+        Parameters:
+         - system - the matrix of the constraints coefs, each row is [a_1, ..., a_n, b]
+         - variables_count - the number of variables n. Required only if the system is empty.
+        """
+        rows = np.array(system, dtype=float)
+        if variables_count is None:
+            variables_count = rows.shape[1] - 1
+        rows = rows.reshape(-1, variables_count + 1)
+
+        self.rows_count = 0
+        self._A = np.empty((max(len(rows), 4), variables_count))
+        self._b = np.empty(len(self._A))
+        self.extend(rows)
+
+    @property
+    def A(self):
+        """
+        Gets the (m x n) array of the constraints coefs.
+        """
+        return self._A[:self.rows_count]
+
+    @property
+    def b(self):
+        """
+        Gets the array of the constraints free terms.
+        """
+        return self._b[:self.rows_count]
+
+    @property
+    def variables_count(self):
+        return self._A.shape[1]
+
+    @property
+    def shape(self):
+        """
+        Gets the shape of the system matrix [A | b].
+        """
+        return self.rows_count, self.variables_count + 1
+
+    def append(self, row):
+        """
+        Appends the constraint [a_1, ..., a_n, b] to the system.
+        """
+        self.extend([row])
+
+    def extend(self, rows):
+        """
+        Appends the constraints (rows of the matrix [A | b]) to the system.
+        """
+        rows = np.array(rows, dtype=float).reshape(-1, self.variables_count + 1)
+        self._reserve(self.rows_count + len(rows))
+        self._A[self.rows_count:self.rows_count + len(rows)] = rows[:, :-1]
+        self._b[self.rows_count:self.rows_count + len(rows)] = rows[:, -1]
+        self.rows_count += len(rows)
+
+    def insert(self, index, row):
+        """
+        Inserts the constraint [a_1, ..., a_n, b] before the given row.
+        """
+        self._reserve(self.rows_count + 1)
+        self._A[index + 1:self.rows_count + 1] = self._A[index:self.rows_count].copy()
+        self._b[index + 1:self.rows_count + 1] = self._b[index:self.rows_count].copy()
+        self._A[index] = row[:-1]
+        self._b[index] = row[-1]
+        self.rows_count += 1
+
+    def check(self, points):
+        """
+        Checks whether the points satisfy all the constraints.
+
+        Parameters:
+         - points - the point or the (k x n) array of points
+
+        Returns the boolean value for the point or the array of k values for the points.
+        """
+        points = np.asarray(points)
+        return np.all(np.dot(points, self.A.T) <= -self.b, axis=-1)
+
+    def get_slack(self, points):
+        """
+        Gets the slack -(a*x + b) of each constraint in the points. The constraint is satisfied if its slack
+        is not negative.
+
+        Parameters:
+         - points - the point or the (k x n) array of points
+
+        Returns the array of m slacks for the point or the (k x m) array for the points.
+        """
+        return -self.b - np.dot(np.asarray(points), self.A.T)
+
+    def copy(self):
+        """
+        Gets the copy of the system.
+        """
+        return ConstraintSystem(self, self.variables_count)
+
+    def tolist(self):
+        """
+        Gets the system as the list of rows [a_1, ..., a_n, b].
+        """
+        return self.__array__().tolist()
+
+    def __len__(self):
+        return self.rows_count
+
+    def __iter__(self):
+        return iter(self.__array__())
+
+    def __array__(self, dtype=None):
+        result = np.hstack((self.A, self.b[:, np.newaxis]))
+        return result if dtype is None else result.astype(dtype)
+
+    def _reserve(self, rows_count):
+        if rows_count <= len(self._A):
+            return
+
+        capacity = max(rows_count, 2 * len(self._A))
+        A, b = np.empty((capacity, self.variables_count)), np.empty(capacity)
+        A[:self.rows_count] = self.A
+        b[:self.rows_count] = self.b
+        self._A, self._b = A, b
@@ -1,22 +1,187 @@
 ___author___ = "Olga Titova"
 
+import sys
+import math
 import itertools as it
+import numpy as np
 from branchandbound import BranchAndBound
 from combinatorial_set import CombinatorialSet
+from permutations import PermutationSet
 
 
 class CyclePermutationSet(CombinatorialSet):
     """
-    Describes the set of permutations
+    Describes the set of cyclic permutations: the permutation x of the elements e_1 < ... < e_n is cyclic
+    if the map of the position i to the position of the element x_i in the generation elements is one cycle
+    of the length n. The set has (n-1)! elements.
+    The cycle 1 -> a_1 -> ... -> a_(n-1) -> 1 is given by the permutation (a_1, ..., a_(n-1)) of 2, ..., n,
+    the cycles are enumerated and ranked in the order of these permutations.
     """
     def __init__(self, s=()):
         super(CyclePermutationSet, self).__init__(s)
 
     def __iter__(self):
-        cp = [[4, 1, 2, 3], [4, 1, 3, 2], [2, 4, 1, 3], [3, 1, 4, 2], [2, 3, 4, 1], [3, 4, 2, 1]]
-        #cp = [[2, 3, 1], [3, 1, 2]]
-        for c in cp:
-            yield  c
+        return self._iterate_cycles(it.permutations(xrange(1, len(self.generation_elements))))
+
+    def get_size(self):
+        """
+        Gets the number of the cyclic permutations (n-1)!.
+        """
+        n = len(self.generation_elements)
+        return math.factorial(n - 1) if n else 0
+
+    def rank(self, points):
+        """
+        Gets the rank of the cyclic permutation: its index in the order of the set iterator.
+
+        Parameters:
+         - points - the cyclic permutation or the (k x n) array of the cyclic permutations
+
+        Returns the rank or the array of the ranks.
+        """
+        points = np.asarray(points)
+        n = len(self.generation_elements)
+        indexes = self._to_indexes(points.reshape(len(points) if points.ndim > 1 else 1, n))
+
+        # follow the cycles from the first position
+        rows = np.arange(len(indexes))
+        cycles = np.empty((len(indexes), n), dtype=int)
+        cycles[:, 0] = 0
+        for i in xrange(1, n):
+            cycles[:, i] = indexes[rows, cycles[:, i - 1]]
+        if n and (np.any(cycles[:, 1:] == 0) or np.any(indexes[rows, cycles[:, -1]] != 0)):
+            raise ValueError("The points are not the cyclic permutations of the set elements")
+
+        ranks = self._get_cycles_set().rank(cycles[:, 1:])
+        return ranks if points.ndim > 1 else int(ranks[0])
+
+    def unrank(self, ranks):
+        """
+        Gets the cyclic permutation by its rank (see rank).
+
+        Parameters:
+         - ranks - the rank or the array of the ranks
+
+        Returns the cyclic permutation as the tuple or the (k x n) array of the cyclic permutations.
+        """
+        ranks = np.asarray(ranks)
+        if np.any((ranks < 0) | (ranks >= self.get_size())):
+            raise ValueError("The ranks should be in the range [0, {0})".format(self.get_size()))
+
+        cycles = self._get_cycles_set().unrank(ranks.reshape(-1))
+        points = self._from_cycles(cycles.reshape(ranks.size, len(self.generation_elements) - 1))
+        return points if ranks.ndim else tuple(points[0].tolist())
+
+    def sample(self, k, rng=None):
+        """
+        Gets the uniformly distributed random cyclic permutations.
+
+        Parameters:
+         - k - the number of the permutations
+         - rng - the random numbers generator, e.g. np.random.RandomState(seed)
+           (default - None, the global numpy generator is used)
+
+        Returns the (k x n) array of the cyclic permutations.
+        """
+        return self._from_cycles(self._get_cycles_set().sample(k, rng))
+
+    def iter_range(self, start, stop=None):
+        """
+        Iterates the cyclic permutations with the ranks start, ..., stop - 1 in the order of the set iterator.
+        """
+        return self._iterate_cycles(self._get_cycles_set().iter_range(start, stop))
+
+    def get_prefixes(self, count):
+        """
+        Gets the ranges of the ranks (start, stop) that split the set into 'count' parts (see iterate_blocks).
+        """
+        size = self.get_size()
+        bounds = [size * i // count for i in xrange(count + 1)]
+        return [(start, stop) for start, stop in zip(bounds, bounds[1:]) if start < stop]
+
+    def iterate_blocks(self, block_size, prefix=None):
+        """
+        Iterates the cyclic permutations by the (k x n) arrays (k <= block_size) in the order of the set iterator.
+
+        Parameters:
+         - block_size - the maximal number of the permutations in the block
+         - prefix - the range of the ranks (start, stop) returned by get_prefixes (default - None, all the set)
+        """
+        start, stop = prefix or (0, self.get_size())
+
+        # the ranks of the large sets do not fit in the C long, so they are stepped by the Python longs
+        while start < stop:
+            block_stop = min(start + block_size, stop)
+            yield self.unrank(np.array(range(start, block_stop), dtype=object if stop > sys.maxint else int))
+            start = block_stop
+
+    def get_neighbors(self, point):
+        """
+        Gets the cyclic permutations made from the cyclic permutation by the conjugation with the transpositions:
+        two elements exchange both their positions and their places in the cycle, so the cycle length is kept.
+
+        Returns the (k x n) array of the cyclic permutations.
+        """
+        n = len(self.generation_elements)
+        indexes = self._to_indexes(np.asarray(point).reshape(1, n))[0]
+
+        # the rows of the transpositions of the indexes a < b
+        a, b = np.triu_indices(n, 1)
+        rows = np.arange(len(a))
+        transpositions = np.tile(np.arange(n), (len(a), 1))
+        transpositions[rows, a] = b
+        transpositions[rows, b] = a
+
+        # the position i goes to the position t(x(t(i))) for the transposition t
+        neighbors = transpositions[rows[:, np.newaxis], indexes[transpositions]]
+        neighbors = neighbors[np.any(neighbors != indexes, axis=1)]
+        return np.array(self.generation_elements)[neighbors].reshape(len(neighbors), n)
+
+    def _iterate_cycles(self, cycles):
+        """
+        Iterates the cyclic permutations of the cycles 0 -> a_1 -> ... -> a_(n-1) -> 0 given by (a_1, ..., a_(n-1)).
+        Each element of the permutation is set once.
+        """
+        n = len(self.generation_elements)
+        if not n:
+            return
+
+        elements = self.generation_elements
+        for cycle in cycles:
+            point = [None] * n
+            position = 0
+            for index in cycle:
+                point[position] = elements[index]
+                position = index
+            point[position] = elements[0]
+            yield tuple(point)
+
+    def _get_cycles_set(self):
+        """
+        Gets the set of the permutations of the indexes 1, ..., n-1 that define the cycles.
+        """
+        return PermutationSet(range(1, len(self.generation_elements)))
+
+    def _to_indexes(self, points):
+        """
+        Gets the positions of the elements of the points in the generation elements.
+        """
+        return PermutationSet(self.generation_elements)._to_indexes(points)
+
+    def _from_cycles(self, cycles):
+        """
+        Gets the cyclic permutations by the (k x n-1) array of the cycles 0 -> a_1 -> ... -> a_(n-1) -> 0.
+        """
+        n = len(self.generation_elements)
+        rows = np.arange(len(cycles))
+        indexes = np.zeros((len(cycles), n), dtype=int)
+        if n > 1:
+            indexes[:, 0] = cycles[:, 0]
+            for i in xrange(n - 2):
+                indexes[rows, cycles[:, i]] = cycles[:, i + 1]
+            indexes[rows, cycles[:, -1]] = 0
+
+        return np.array(self.generation_elements)[indexes].reshape(len(cycles), n)
 
     def find_min_of_linear_function(self, coefs):
         """
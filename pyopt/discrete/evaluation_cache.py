@@ -0,0 +1,74 @@
+__author__ = "Alex Baranov"
+
+from collections import OrderedDict
+
+
+class EvaluationCache(object):
+    """
+    The LRU cache of the evaluated set points of the search: the goal function value of the point,
+    whether the point satisfies the constraints and the number of the constraints it was checked with.
+    The search appends the constraints only, so the valid point is checked later with the new constraints only.
+    The cache is valid for one goal function and one constraints system.
+    """
+
+    def __init__(self, max_size=100000):
+        """
+        Creates instance of the EvaluationCache class.
+
+        Parameters:
+         - max_size - the maximal number of the cached points
+        """
+        self.max_size = max_size
+        self._items = OrderedDict()
+
+        # counters for the monitoring
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, point):
+        """
+        Gets the (goal function value, valid, checked constraints count) of the point
+        or None if the point was not evaluated.
+        """
+        key = tuple(point)
+        if key in self._items:
+            value = self._items.pop(key)
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        return None
+
+    def put(self, point, func_value, valid, constraints_count):
+        """
+        Puts the evaluation of the point to the cache.
+        """
+        key = tuple(point)
+        self._items.pop(key, None)
+        self._items[key] = func_value, valid, constraints_count
+
+        # evict the least recently used points
+        while len(self._items) > self.max_size:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Removes all the points from the cache.
+        """
+        self._items.clear()
+
+    def get_hit_rate(self):
+        """
+        Gets the part of the requests that were served from the cache.
+        """
+        requests = self.hits + self.misses
+        return float(self.hits) / requests if requests else 0.0
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, point):
+        return tuple(point) in self._items
@@ -0,0 +1,346 @@
+"""
+The benchmark of the Chernikov method on the generated constraints systems.
+
+Usage:
+    python -m pyopt.discrete.inequalities.benchmark run results.json
+    python -m pyopt.discrete.inequalities.benchmark compare baseline.json results.json
+"""
+
+__author__ = 'Alex Baranov'
+
+import sys
+import json
+import time
+import platform
+import argparse
+import itertools
+import multiprocessing
+import numpy as np
+from collections import namedtuple
+
+import chernikov as c
+from pyopt.discrete import randomsearch
+
+# the benchmark case: the name, the solved function ("inequalities" or "equations"),
+# the name of the system generator, its parameters and the solver options
+BenchmarkCase = namedtuple("BenchmarkCase", ["name", "solver", "generator", "params", "options"])
+
+# the metrics compared between the benchmark runs
+COMPARED_METRICS = ("time", "peak_memory_kb", "max_rows")
+
+
+def generate_random_system(rows, variables, seed=0):
+    """
+    Generates the random integer inequalities system (ax + d <= 0) which has the positive solution.
+
+    Keyword arguments:
+        rows -- the number of the inequalities
+        variables -- the number of the variables
+        seed -- the seed of the random numbers generator (default - 0)
+    """
+    rng = np.random.RandomState(seed)
+    coefs = rng.randint(-9, 10, (rows, variables))
+    return _add_free_terms(coefs, rng)
+
+
+def generate_sparse_system(rows, variables, density=0.1, seed=0):
+    """
+    Generates the random sparse inequalities system which has the positive solution.
+    Returns the scipy.sparse CSR matrix or the dense array if scipy is not installed.
+
+    Keyword arguments:
+        rows -- the number of the inequalities
+        variables -- the number of the variables
+        density -- the part of the non-zero coefs of the variables (default - 0.1)
+        seed -- the seed of the random numbers generator (default - 0)
+    """
+    rng = np.random.RandomState(seed)
+    coefs = rng.randint(-9, 10, (rows, variables)) * (rng.random_sample((rows, variables)) < density)
+    system = _add_free_terms(coefs, rng)
+    return c.sparse.csr_matrix(system) if c.sparse is not None else system
+
+
+def generate_simplex_bounded_system(rows, variables, seed=0):
+    """
+    Generates the random inequalities system extended with the simplex constraints of the permutations
+    of 1, ..., variables the same way find_minimum extends the system it solves (x_i >= 1 and
+    the sum of the variables is not greater than the sum of the elements).
+
+    Keyword arguments:
+        rows -- the number of the random inequalities
+        variables -- the number of the variables
+        seed -- the seed of the random numbers generator (default - 0)
+    """
+    system = generate_random_system(rows, variables, seed)
+    return np.array(randomsearch.add_additional_constraints(system, np.arange(1, variables + 1)))
+
+
+def generate_permutation_polytope_system(variables):
+    """
+    Generates the inequalities system of the permutation polytope of 1, ..., variables:
+    the sum of any k variables is not less than 1 + ... + k and the sum of all the variables
+    is equal to 1 + ... + variables.
+
+    Keyword arguments:
+        variables -- the number of the variables
+    """
+    rows = []
+    for size in xrange(1, variables):
+        for subset in itertools.combinations(xrange(variables), size):
+            row = np.zeros(variables + 1, dtype=int)
+            row[list(subset)] = -1
+            row[-1] = size * (size + 1) // 2
+            rows.append(row)
+
+    total = np.ones(variables + 1, dtype=int)
+    total[-1] = -variables * (variables + 1) // 2
+    rows.extend([total, -total])
+    return np.array(rows)
+
+
+def generate_equations_system(rows, variables, seed=0):
+    """
+    Generates the random homogeneous integer equations system.
+
+    Keyword arguments:
+        rows -- the number of the equations
+        variables -- the number of the variables
+        seed -- the seed of the random numbers generator (default - 0)
+    """
+    rng = np.random.RandomState(seed)
+    return rng.randint(-9, 10, (rows, variables))
+
+
+GENERATORS = {"random": generate_random_system,
+              "sparse": generate_sparse_system,
+              "simplex": generate_simplex_bounded_system,
+              "permutation": generate_permutation_polytope_system,
+              "equations": generate_equations_system}
+
+
+def _add_free_terms(coefs, rng):
+    """
+    Adds the free terms column to the coefs, so the random positive point satisfies all the inequalities.
+    """
+    point = rng.randint(1, 10, coefs.shape[1])
+    free_terms = -np.dot(coefs, point) - rng.randint(0, 10, coefs.shape[0])
+    return np.hstack((coefs, free_terms[:, np.newaxis]))
+
+
+def get_cases(scale=1, options=None, variables_scale=1):
+    """
+    Gets the benchmark cases of the increasing sizes.
+    The tables grow with the number of the variables much faster than with the number of the rows,
+    so the wide cases have a few rows only.
+
+    Keyword arguments:
+        scale -- the multiplier of the systems rows counts (default - 1)
+        options -- the options of find_sfs_of_even_inequalities_system (default - None)
+        variables_scale -- the multiplier of the systems variables counts. The permutation polytope
+            cases are not scaled, their rows count is exponential in the number of the variables (default - 1)
+    """
+    options = options or {}
+    cases = []
+    for rows in (4, 8, 12):
+        for variables in (4, 6, 8):
+            params = dict(rows=rows * scale, variables=variables * variables_scale)
+            cases.append(BenchmarkCase("random-{rows}x{variables}".format(**params), "inequalities", "random",
+                                       params, options))
+            cases.append(BenchmarkCase("simplex-{rows}x{variables}".format(**params), "inequalities", "simplex",
+                                       params, options))
+
+    for rows, variables in ((4, 16), (4, 20)):
+        params = dict(rows=rows * scale, variables=variables * variables_scale)
+        cases.append(BenchmarkCase("random-{rows}x{variables}".format(**params), "inequalities", "random",
+                                   params, options))
+
+    for rows, variables in ((50, 8), (100, 6), (200, 6), (10, 16)):
+        params = dict(rows=rows * scale, variables=variables * variables_scale, density=0.2)
+        cases.append(BenchmarkCase("sparse-{rows}x{variables}".format(**params), "inequalities", "sparse",
+                                   params, options))
+
+    for variables in (4, 5, 6):
+        cases.append(BenchmarkCase("permutation-{0}".format(variables), "inequalities", "permutation",
+                                   dict(variables=variables), options))
+
+    for rows, variables in ((2, 8), (3, 10), (4, 12), (4, 20)):
+        params = dict(rows=rows, variables=variables * variables_scale)
+        cases.append(BenchmarkCase("equations-{rows}x{variables}".format(**params), "equations", "equations",
+                                   params, {}))
+
+    return cases
+
+
+def run_case(case, repeat=1, isolated=True):
+    """
+    Runs the benchmark case. Returns the dict with the case results:
+    the best time in seconds, the peak memory growth in KB, the steps count, the maximal rows count of the tables,
+    the number of the checked row pairs and the rows count of the fundamental system.
+
+    Keyword arguments:
+        case -- the BenchmarkCase to run
+        repeat -- the number of the solutions, the best time is saved (default - 1)
+        isolated -- run the case in the separate process, so the peak memory is not affected
+            by the other cases (default - True)
+    """
+    if not isolated:
+        return _measure_case(case, repeat)
+
+    receiver, sender = multiprocessing.Pipe(duplex=False)
+    process = multiprocessing.Process(target=_run_case_process, args=(case, repeat, sender))
+    process.start()
+    result = receiver.recv()
+    process.join()
+
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+
+def _run_case_process(case, repeat, sender):
+    try:
+        sender.send(_measure_case(case, repeat))
+    except Exception as e:
+        sender.send(e)
+
+
+def _measure_case(case, repeat):
+    system = GENERATORS[case.generator](**case.params)
+    if case.solver == "equations":
+        solve = c.find_sfs_of_equation_system
+    else:
+        solve = c.find_sfs_of_even_inequalities_system
+
+    start_memory = _get_peak_memory_kb()
+    times = []
+    for _ in xrange(repeat):
+        stats = c.SolverStats()
+        started = time.time()
+        result = solve(system, stats=stats, **case.options)
+        times.append(time.time() - started)
+
+    return dict(name=case.name,
+                solver=case.solver,
+                rows=system.shape[0],
+                variables=system.shape[1],
+                time=min(times),
+                peak_memory_kb=_get_peak_memory_kb() - start_memory,
+                steps=len(stats.steps),
+                max_rows=stats.get_max_rows(),
+                pairs_considered=sum(step.pairs_considered for step in stats.steps),
+                result_rows=result.shape[0])
+
+
+def _get_peak_memory_kb():
+    """
+    Gets the maximum resident set size of the process (in KB on Linux) or 0 if it is not available.
+    """
+    try:
+        # the resource module is not available on Windows
+        import resource
+    except ImportError:
+        return 0
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_benchmark(cases=None, repeat=3, isolated=True, quiet=True):
+    """
+    Runs the benchmark cases. Returns the dict with the environment info and the cases results.
+
+    Keyword arguments:
+        cases -- the list of the BenchmarkCase (default - None, the get_cases() are used)
+        repeat -- the number of the solutions of each case (default - 3)
+        isolated -- run each case in the separate process (default - True)
+        quiet -- do not print the results of the cases (default - True)
+    """
+    results = []
+    for case in cases or get_cases():
+        result = run_case(case, repeat, isolated)
+        results.append(result)
+        if not quiet:
+            print "{name:<20} {time:10.4f}s {peak_memory_kb:8d}KB {max_rows:8d} rows".format(**result)
+
+    environment = dict(python=platform.python_version(),
+                       numpy=np.__version__,
+                       platform=platform.platform(),
+                       started=time.strftime("%Y-%m-%d %H:%M:%S"))
+    return dict(environment=environment, results=results)
+
+
+def save_results(results, path):
+    """
+    Saves the benchmark results to the JSON file.
+    """
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+
+def load_results(path):
+    """
+    Loads the benchmark results from the JSON file.
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare_results(baseline, current, threshold=1.2):
+    """
+    Compares the benchmark results of the same cases.
+    Returns the list of the (case name, metric, baseline value, current value, ratio) tuples
+    for the metrics that grew more than the threshold times.
+
+    Keyword arguments:
+        baseline -- the baseline results
+        current -- the current results
+        threshold -- the allowed ratio of the current and the baseline values (default - 1.2)
+    """
+    baseline_cases = dict((result["name"], result) for result in baseline["results"])
+    regressions = []
+    for result in current["results"]:
+        if result["name"] not in baseline_cases:
+            continue
+
+        for metric in COMPARED_METRICS:
+            old, new = baseline_cases[result["name"]][metric], result[metric]
+            ratio = float(new) / old if old else (float("inf") if new else 1.0)
+            if ratio > threshold:
+                regressions.append((result["name"], metric, old, new, ratio))
+
+    return regressions
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="The benchmark of the Chernikov method")
+    commands = parser.add_subparsers(dest="command")
+
+    run_parser = commands.add_parser("run", help="run the benchmark and save the results")
+    run_parser.add_argument("output", help="the JSON file of the results")
+    run_parser.add_argument("--scale", type=int, default=1, help="the multiplier of the systems rows counts")
+    run_parser.add_argument("--variables-scale", type=int, default=1,
+                            help="the multiplier of the systems variables counts")
+    run_parser.add_argument("--repeat", type=int, default=3, help="the number of the solutions of each case")
+    run_parser.add_argument("--strategy", default="first", help="the main column strategy")
+    run_parser.add_argument("--exact", action="store_true", help="use the exact integer arithmetic")
+
+    compare_parser = commands.add_parser("compare", help="compare the results of two runs")
+    compare_parser.add_argument("baseline", help="the JSON file of the baseline results")
+    compare_parser.add_argument("current", help="the JSON file of the current results")
+    compare_parser.add_argument("--threshold", type=float, default=1.2, help="the allowed growth ratio")
+
+    args = parser.parse_args(args)
+    if args.command == "run":
+        options = dict(main_column_strategy=args.strategy, exact=args.exact)
+        results = run_benchmark(get_cases(args.scale, options, args.variables_scale), args.repeat, quiet=False)
+        save_results(results, args.output)
+        return 0
+
+    regressions = compare_results(load_results(args.baseline), load_results(args.current), args.threshold)
+    for name, metric, old, new, ratio in regressions:
+        print "{0:<20} {1:<16} {2:>12} -> {3:<12} x{4:.2f}".format(name, metric, old, new, ratio)
+    if not regressions:
+        print "No regressions found"
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,186 @@
+__author__ = 'Alex Baranov'
+
+import os
+import hashlib
+import tempfile
+import numpy as np
+from collections import OrderedDict
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    sparse = None
+
+
+class FundamentalSystemCache(object):
+    """
+    The LRU cache of the fundamental systems of solutions keyed by the content of the constraints system.
+    The systems are kept in memory within the memory budget. If the directory is provided the systems
+    are also saved there as npz files, so they can be reused by the other processes.
+    The solver may keep its elimination state with the system in memory to extend the system incrementally
+    after the cache hit, the states are not saved to the directory.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, directory=None):
+        """
+        Creates instance of the FundamentalSystemCache class.
+
+        Parameters
+
+         - max_bytes: the memory budget of the cache.
+         - directory: the directory of the persistent store (default - None, the systems are kept only in memory).
+        """
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.used_bytes = 0
+        self._items = OrderedDict()
+        self._states = {}
+
+        # counters for the monitoring
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def get_key(system, *options):
+        """
+        Gets the cache key of the constraints system: the hash of its shape, type and content
+        together with the solver options that affect the solution.
+        The sparse systems are hashed by their CSR structure.
+        """
+        if sparse is not None and sparse.issparse(system):
+            csr = sparse.csr_matrix(system, copy=True)
+            csr.sum_duplicates()
+            csr.eliminate_zeros()
+            key = hashlib.sha1(repr(("csr", csr.shape, csr.dtype.str, options)))
+            for array in (csr.data, csr.indices, csr.indptr):
+                key.update(np.ascontiguousarray(array).tostring())
+            return key.hexdigest()
+
+        npsystem = np.ascontiguousarray(system)
+        key = hashlib.sha1(repr((npsystem.shape, npsystem.dtype.str, options)))
+        if npsystem.dtype == object:
+            key.update(repr(npsystem.tolist()))
+        else:
+            key.update(npsystem.tostring())
+
+        return key.hexdigest()
+
+    def get(self, key):
+        """
+        Gets the copy of the cached fundamental system or None if the system is not in the cache.
+        """
+        if key in self._items:
+            value = self._items.pop(key)
+            self._items[key] = value
+            self.hits += 1
+            return value.copy()
+
+        value = self._load(key)
+        if value is not None:
+            self._store(key, value)
+            self.hits += 1
+            self.disk_hits += 1
+            return value.copy()
+
+        self.misses += 1
+        return None
+
+    def get_state(self, key):
+        """
+        Gets the state kept with the cached fundamental system or None if there is no such state.
+        The state is shared, so it should not be changed. The hits are not counted.
+        """
+        if key not in self._items:
+            return None
+        return self._states.get(key)
+
+    def put(self, key, value, state=None):
+        """
+        Puts the fundamental system to the cache.
+
+        Parameters
+
+         - key: the key of the system.
+         - value: the fundamental system.
+         - state: the object with the 'nbytes' attribute kept in memory with the system
+           (default - None, there is no state).
+        """
+        value = np.array(value)
+        self._store(key, value, state)
+        if self.directory is not None:
+            self._save(key, value)
+
+    def clear(self):
+        """
+        Removes all the systems from memory. The persistent store is not changed.
+        """
+        self._items.clear()
+        self._states.clear()
+        self.used_bytes = 0
+
+    def get_hit_rate(self):
+        """
+        Gets the part of the requests that were served from the cache.
+        """
+        requests = self.hits + self.misses
+        return float(self.hits) / requests if requests else 0.0
+
+    def _store(self, key, value, state=None):
+        if key in self._items:
+            self._remove(key)
+
+        if state is not None and value.nbytes + state.nbytes > self.max_bytes:
+            # the system is kept without the state then
+            state = None
+
+        if value.nbytes > self.max_bytes:
+            # the system does not fit in the memory budget at all
+            return
+
+        self._items[key] = value
+        self.used_bytes += value.nbytes
+        if state is not None:
+            self._states[key] = state
+            self.used_bytes += state.nbytes
+
+        # evict the least recently used systems
+        while self.used_bytes > self.max_bytes:
+            self._remove(next(iter(self._items)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self.used_bytes -= self._items.pop(key).nbytes
+        state = self._states.pop(key, None)
+        if state is not None:
+            self.used_bytes -= state.nbytes
+
+    def _get_path(self, key):
+        return os.path.join(self.directory, key + ".npz")
+
+    def _load(self, key):
+        if self.directory is None or not os.path.exists(self._get_path(key)):
+            return None
+
+        with np.load(self._get_path(key)) as data:
+            value = data["fundamental_system"]
+            if data["big_integers"]:
+                # Python integers are saved as strings to avoid pickling
+                value = np.vectorize(int, otypes=[object])(value) if value.size else value.astype(object)
+
+        return value
+
+    def _save(self, key, value):
+        if not os.path.isdir(self.directory):
+            os.makedirs(self.directory)
+
+        big_integers = value.dtype == object
+        if big_integers:
+            value = value.astype(str)
+
+        # the file is written under the temporary name first, so the readers never see the partial file
+        handle, temp_path = tempfile.mkstemp(suffix=".npz", dir=self.directory)
+        with os.fdopen(handle, "wb") as f:
+            np.savez(f, fundamental_system=value, big_integers=big_integers)
+        os.rename(temp_path, self._get_path(key))
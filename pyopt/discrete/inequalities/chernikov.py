@@ -1,10 +1,203 @@
 __author__ = 'Alex Baranov'
 
+import sys
+import time
+import ctypes
 import numpy as np
-import itertools as iter
+import multiprocessing
+from multiprocessing.sharedctypes import RawArray
+from collections import namedtuple
+from cache import FundamentalSystemCache
+
+try:
+    import scipy.sparse as sparse
+except ImportError:
+    # the sparse constraints systems are not supported
+    sparse = None
 
 __PRINT_DEBUG = False
 
+# the maximal number of elements in the temporary matrices of the adjacency test
+_ADJACENCY_BLOCK_SIZE = 1 << 22
+
+# the absolute values that are not less than this bound may overflow int64 in the exact mode
+_INT64_BOUND = float(2 ** 62)
+
+# all the integers which absolute values are less than this bound are represented by float64
+_FLOAT_INTEGER_BOUND = float(2 ** 53)
+
+# the relative tolerance used to find the zero constraint values of the float solutions
+_ZERO_TOLERANCE = 1e-9
+
+# the minimal number of the row pairs of the step that are combined by the processes pool
+_PARALLEL_PAIRS_THRESHOLD = 100000
+
+# the tables shared with the pool process that combines the row pairs
+_worker_tables = None
+
+
+class _TableBuffer(object):
+    """
+    The table which rows are written in place to the preallocated storage.
+    The storage grows geometrically, so appending a row takes amortized constant time.
+    """
+
+    def __init__(self, width, dtype, capacity=16):
+        self._data = np.empty((max(capacity, 1), width), dtype=dtype)
+        self.rows_count = 0
+
+    def reserve(self, count):
+        """
+        Makes sure that the storage is able to hold 'count' more rows.
+        """
+        required = self.rows_count + count
+        capacity = self._data.shape[0]
+        if required <= capacity:
+            return
+
+        while capacity < required:
+            capacity *= 2
+
+        data = np.empty((capacity, self._data.shape[1]), dtype=self._data.dtype)
+        data[:self.rows_count] = self._data[:self.rows_count]
+        self._data = data
+
+    def append(self, row):
+        """
+        Writes the row to the end of the table.
+        """
+        self.reserve(1)
+        self._data[self.rows_count] = row
+        self.rows_count += 1
+
+    def extend(self, rows):
+        """
+        Writes the block of rows to the end of the table.
+        The storage switches to the Python objects if the rows are the Python objects. The whole table is promoted,
+        not only the overflowing rows: the table is one NumPy array, and splitting it into int64 and object blocks
+        would have to be followed by the adjacency test, the normalization and the duplicates removal of each step.
+        The normalization casts the tables back to int64 as soon as all the values fit (see _to_int64_if_fits),
+        so the slow Python integers path lasts only while the big values remain. The combinations of the big rows
+        are big as well, so most rows of the promoted tables overflow int64 anyway.
+        """
+        if rows.dtype == object and self._data.dtype != object:
+            self._data = self._data.astype(object)
+
+        self.reserve(len(rows))
+        self._data[self.rows_count:self.rows_count + len(rows)] = rows
+        self.rows_count += len(rows)
+
+    def table(self):
+        """
+        Gets the filled part of the storage. No data is copied.
+        """
+        return self._data[:self.rows_count]
+
+
+class _SparseTableBuffer(object):
+    """
+    The sparse table which rows are collected as the blocks of CSR matrices.
+    """
+
+    def __init__(self, width, dtype):
+        self.width = width
+        self.dtype = dtype
+        self.rows_count = 0
+        self._blocks = []
+
+    def extend(self, rows):
+        """
+        Appends the rows of the sparse matrix to the table.
+        """
+        self._blocks.append(sparse.csr_matrix(rows))
+        self.rows_count += rows.shape[0]
+
+    def table(self):
+        """
+        Gets the CSR matrix of the table rows.
+        """
+        if not self._blocks:
+            return sparse.csr_matrix((0, self.width), dtype=self.dtype)
+
+        result = sparse.vstack(self._blocks, format="csr")
+        result.eliminate_zeros()
+        return result
+
+
+def _new_table_buffer(table):
+    """
+    Creates the empty buffer for the next table of the same type as the given table.
+    """
+    if _is_sparse(table):
+        return _SparseTableBuffer(table.shape[1], table.dtype)
+    return _TableBuffer(table.shape[1], table.dtype, table.shape[0])
+
+
+# the information about one elimination step of the Chernikov method:
+#  - index: the number of the step
+#  - main_column: the index of the main column
+#  - rows_in: the rows count of the table before the step
+#  - rows_out: the rows count of the table after the step
+#  - pairs_considered: the number of the row pairs with the opposite signs on the main column
+#  - pairs_accepted: the number of the adjacent pairs that were combined
+#  - predicted_rows: the rows count of the new table predicted by the main column strategy
+#  - actual_rows: the rows count of the new table before the duplicates removal
+#  - duplicates_removed: the number of the removed duplicate rows
+#  - elapsed: the wall time of the step in seconds
+EliminationStep = namedtuple("EliminationStep", ["index", "main_column", "rows_in", "rows_out",
+                                                 "pairs_considered", "pairs_accepted", "predicted_rows",
+                                                 "actual_rows", "duplicates_removed", "elapsed"])
+
+
+class SolverStats(object):
+    """
+    Collects the information about the elimination steps of the Chernikov method.
+    """
+
+    def __init__(self):
+        self.steps = []
+
+        # the number of the not extreme solutions removed from the fundamental system
+        self.redundant_removed = 0
+
+    def add_step(self, step):
+        """
+        Saves the information about the elimination step.
+        """
+        self.steps.append(step)
+
+    def get_total_time(self):
+        """
+        Gets the total wall time of the elimination steps in seconds.
+        """
+        return sum(step.elapsed for step in self.steps)
+
+    def get_max_rows(self):
+        """
+        Gets the maximal rows count of the tables.
+        """
+        return max([step.rows_in for step in self.steps[:1]] + [step.rows_out for step in self.steps] or [0])
+
+    def to_records(self):
+        """
+        Gets the steps as the list of dicts, e.g. to build the data frame or the plot.
+        """
+        return [dict(step._asdict()) for step in self.steps]
+
+
+def _report_step(stats, callback, step):
+    """
+    Passes the elimination step info to the stats and the callback.
+    """
+    if stats is not None:
+        stats.add_step(step)
+    if callback is not None:
+        callback(step)
+
+
+# the default of the solver cache argument that means the shared cache, None disables caching
+_SHARED_CACHE = object()
+
 
 class InequalitiesSolver(object):
     last_system = None
@@ -12,44 +205,240 @@ class InequalitiesSolver(object):
     min_random = 1
     max_random = 1000
 
+    last_stats = None
+
+    # the cache of the fundamental systems shared by all the solvers
+    cache = FundamentalSystemCache()
+
+    # the elimination states of the last system prefixes: [(rows_count, state), ...]
+    _states = ()
+    _states_options = None
+
+    def __init__(self, exact=False, main_column_strategy="first", deduplicate=True, remove_redundant=False,
+                 workers=None, callback=None, cache=_SHARED_CACHE):
+        """
+        Creates instance of the InequalitiesSolver class.
+
+        Parameters
+
+         - exact: use the exact integer arithmetic. Requires the integer system coefs.
+         - main_column_strategy: the name of the main column selection heuristic
+           ("first", "min_product" or "fewest_rows") or the selection function.
+           See find_sfs_of_even_inequalities_system for details.
+         - deduplicate: normalize the rows of each table and remove the duplicates.
+         - remove_redundant: remove the not extreme solutions from the fundamental system.
+         - workers: the number of processes that combine the row pairs of the large tables.
+         - callback: the function that receives the EliminationStep info after each elimination step.
+           The steps of the last solution are also collected in the 'last_stats' attribute.
+         - cache: the FundamentalSystemCache instance or None to disable caching (default - the cache shared
+           by all the solvers). The systems of the not registered strategy functions are not cached,
+           the different functions may have the same name.
+        """
+        self.exact = exact
+        self.main_column_strategy = main_column_strategy
+        self.deduplicate = deduplicate
+        self.remove_redundant = remove_redundant
+        self.workers = workers
+        self.callback = callback
+        if cache is not _SHARED_CACHE:
+            self.cache = cache
+
     def find_foundamental_system_of_solution(self, system):
         """
         Searches the fundamental systems of non-nagative solutions for the ineqalities system
 
         Parameters
 
-         - system: matrix of ineqailities coefs (ax + by + cz + d .... <= 0)
+         - system: matrix of ineqailities coefs (ax + by + cz + d .... <= 0). The scipy.sparse matrices are
+           solved with the sparse T2 tables.
         """
-        self.last_system = np.array(system)
-        self.last_found_fundamental_system = find_sfs_of_even_inequalities_system(system)
+        npsystem = _copy_system(system)
+        self.last_stats = SolverStats()
+        options = self._get_elimination_options()
+
+        key = None
+        strategy_name = _get_strategy_name(self.main_column_strategy)
+        if self.cache is not None and strategy_name is not None:
+            key_options = dict(options, remove_redundant=self.remove_redundant, main_column_strategy=strategy_name)
+            del key_options["workers"]
+            key = self.cache.get_key(npsystem, sorted(key_options.items()))
+            cached = self.cache.get(key)
+            if cached is not None:
+                # the elimination state kept with the cached system allows to extend the system incrementally
+                state = self.cache.get_state(key)
+                self._states = () if state is None else [(npsystem.shape[0], state)]
+                self._states_options = options
+                self.last_system = npsystem
+                self.last_found_fundamental_system = cached
+                return self.last_found_fundamental_system
+
+        # the system that extends the last one (or replaces its last rows) is solved incrementally
+        base = self._find_base_state(npsystem)
+        if base is None:
+            state = _start_elimination(npsystem, self.exact)
+            states = []
+        else:
+            rows_count, base_state = base
+            state = _append_constraints(base_state, npsystem[rows_count:], self.exact)
+            states = [base]
+
+        _eliminate(state, stats=self.last_stats, callback=self.callback, **options)
+        self._states = states + [(npsystem.shape[0], state)]
+        self._states_options = options
+
+        self.last_system = npsystem
+        self.last_found_fundamental_system = state.get_fundamental_system()
+        if self.remove_redundant:
+            self.last_found_fundamental_system, self.last_stats.redundant_removed = \
+                remove_redundant_solutions(self.last_found_fundamental_system, npsystem, self.exact)
+
+        if key is not None:
+            self.cache.put(key, self.last_found_fundamental_system, state)
+
         return self.last_found_fundamental_system
 
-    def get_solution(self, system, p=None):
+    def _find_base_state(self, npsystem):
         """
-        Gets the solution that agrees with the system.
+        Gets the saved state (rows_count, state) of the longest last system prefix that is also the prefix
+        of the given system or None if there is no such state.
         """
-        npsystem = np.array(system)
-        if not np.array_equal(npsystem, self.last_system):
-            # need to recalcualate the fundamental system
-            self.find_foundamental_system_of_solution(system)
+        if not self._states or self._states_options != self._get_elimination_options():
+            return None
+
+        if npsystem.ndim != 2 or npsystem.shape[1] != self.last_system.shape[1]:
+            return None
 
-        # numbers of rows in the fundamental system
-        n = self.last_found_fundamental_system.shape[0]
+        for rows_count, state in reversed(self._states):
+            if rows_count <= npsystem.shape[0] and \
+                    _systems_equal(npsystem[:rows_count], self.last_system[:rows_count]):
+                return rows_count, state
+
+        return None
+
+    def _get_elimination_options(self):
+        """
+        Gets the options of the solver that affect the elimination steps.
+        """
+        return dict(exact=self.exact,
+                    main_column_strategy=self.main_column_strategy,
+                    deduplicate=self.deduplicate,
+                    workers=self.workers)
+
+    def get_solution(self, system, p=None, rng=None):
+        """
+        Gets the solution that agrees with the system.
+
+        Parameters
+
+         - system: matrix of ineqailities coefs
+         - p: the weights of the fundamental solutions (default - None, the random weights are used)
+         - rng: the random numbers generator (default - None, the global numpy generator is used)
+        """
+        npsystem = self._update_fundamental_system(system)
 
         if (self.last_found_fundamental_system == 0).all():
             return [0] * (npsystem.shape[1] - 1)
 
         # use provided or generate random coefficients
         if p is None:
-            # generate random coefs
-            p = np.random.random_integers(self.min_random, self.max_random, (n, 1))
-            while(p <= 0).all():
-                p = np.random.random_integers(self.min_random, self.max_random, (n, 1))
+            return self.get_solutions(system, 1, rng)[0]
 
-        # getting random solution
-        mult = p * self.last_found_fundamental_system
-        b = sum(mult[:, :-1]) / sum(mult[:, -1])
-        return b
+        fundamental_system = self.last_found_fundamental_system.astype(float)
+        return _combine_solutions(fundamental_system, np.reshape(p, (1, -1)))[0]
+
+    def get_solutions(self, system, k, rng=None, weights="integer", support=None):
+        """
+        Gets k random solutions that agree with the system.
+        All the solutions are calculated at once.
+
+        Parameters
+
+         - system: matrix of ineqailities coefs
+         - k: the number of the solutions
+         - rng: the random numbers generator, e.g. np.random.RandomState(seed)
+           (default - None, the global numpy generator is used)
+         - weights: the distribution of the fundamental solutions weights:
+            "integer" - the integer weights from [min_random, max_random]. Gives the same solutions
+            as k calls of get_solution with the same generator while min_random is positive;
+            "dirichlet" - the weights are uniformly distributed on the simplex;
+            "sparse" - the integer weights of the 'support' randomly selected fundamental solutions.
+         - support: the number of the non-zero weights for the "sparse" weights
+           (default - None, the number of variables)
+
+        Returns the (k x n) array of the solutions.
+        """
+        npsystem = self._update_fundamental_system(system)
+        fundamental_system = self.last_found_fundamental_system.astype(float)
+        rows_count = fundamental_system.shape[0]
+
+        if (fundamental_system == 0).all():
+            return np.zeros((k, npsystem.shape[1] - 1))
+
+        rng = rng or np.random
+        if weights == "integer":
+            p = _random_integers(rng, self.min_random, self.max_random, (k, rows_count))
+            zero = (p <= 0).all(axis=1)
+            while zero.any():
+                p[zero] = _random_integers(rng, self.min_random, self.max_random, (zero.sum(), rows_count))
+                zero = (p <= 0).all(axis=1)
+        elif weights == "dirichlet":
+            p = rng.dirichlet(np.ones(rows_count), size=k)
+        elif weights == "sparse":
+            p = _random_integers(rng, self.min_random, self.max_random, (k, rows_count))
+            p *= _get_random_support(rng, fundamental_system, k, support or npsystem.shape[1] - 1)
+        else:
+            raise ValueError("Unknown weights distribution: '{0}'".format(weights))
+
+        return _combine_solutions(fundamental_system, p)
+
+    def _update_fundamental_system(self, system):
+        """
+        Recalculates the fundamental system if the system differs from the last one.
+        """
+        npsystem = _copy_system(system)
+        if not _systems_equal(npsystem, self.last_system):
+            # need to recalcualate the fundamental system
+            self.find_foundamental_system_of_solution(system)
+
+        return npsystem
+
+
+def _combine_solutions(fundamental_system, p):
+    """
+    Gets the solutions given by the (k x n) weights of the fundamental solutions.
+    get_solution and get_solutions use the same product, so the same weights give exactly the same points.
+    """
+    mult = np.dot(p, fundamental_system)
+    return mult[:, :-1] / mult[:, -1:]
+
+
+def _random_integers(rng, low, high, size):
+    """
+    Gets the random integers from the [low, high] interval using numpy RandomState or Generator.
+    """
+    if hasattr(rng, "integers"):
+        return rng.integers(low, high, size, endpoint=True)
+    return rng.randint(low, high + 1, size)
+
+
+def _get_random_support(rng, fundamental_system, k, support):
+    """
+    Gets the (k x rows) mask of the randomly selected fundamental solutions.
+    Each row of the mask selects at least one solution with the non-zero last element,
+    so the weighted sum of the solutions gives the finite point.
+    """
+    rows_count = fundamental_system.shape[0]
+    random = rng.random if hasattr(rng, "integers") else rng.random_sample
+
+    # random permutations of the fundamental solutions
+    selected = np.argsort(random((k, rows_count)), axis=1)[:, :support]
+    mask = np.zeros((k, rows_count), dtype=bool)
+    mask[np.arange(k)[:, np.newaxis], selected] = True
+
+    finite = np.where(fundamental_system[:, -1] != 0)[0]
+    if len(finite):
+        mask[np.arange(k), finite[(random(k) * len(finite)).astype(int)]] = True
+    return mask
 
 
 def add_additional_constraints(constraints_system, constraint_coefs, add_less_then_zero=True, add_simplex=True):
@@ -68,12 +457,18 @@ def add_additional_constraints(constraints_system, constraint_coefs, add_less_th
 
     var_count = constraints_system.shape[1]
 
+    # the sparse constraints system stays sparse
+    if _is_sparse(constraints_system):
+        vstack = lambda blocks: sparse.vstack(blocks, format="csr")
+    else:
+        vstack = np.vstack
+
     if add_less_then_zero:
         # add conditional constraints that all variables are less or equal than zero
         left_part = -1 * np.eye(var_count - 1)
         right_part = np.zeros([var_count - 1, 1])
         positive_variables_consts = np.hstack((left_part, right_part))
-        constraints_system = np.vstack((constraints_system, positive_variables_consts))
+        constraints_system = vstack((constraints_system, positive_variables_consts))
 
     if add_simplex:
         left_part = np.eye(var_count - 1)
@@ -87,222 +482,818 @@ def add_additional_constraints(constraints_system, constraint_coefs, add_less_th
 
         # first add constraints of type: x_i <= sum
         type2 = np.hstack((left_part, right_part2))
-        constraints_system = np.vstack((constraints_system, type1))
-        constraints_system = np.vstack((constraints_system, type2))
+        constraints_system = vstack((constraints_system, type1))
+        constraints_system = vstack((constraints_system, type2))
 
     return constraints_system
 
 
-def find_sfs_of_equation_system(system):
+def find_sfs_of_equation_system(system, exact=False, deduplicate=True, stats=None, callback=None):
     """
     Calculates the system of the fundamental solutions using the Chernikov method for the linear system of equations
 
     Keyword arguments:
         system -- constraints matrix
+        exact -- use the exact integer arithmetic. The system should have the integer coefs (default - False)
+        deduplicate -- normalize the rows of each table and remove the duplicates (default - True)
+        stats -- the SolverStats instance which collects the elimination steps info (default - None)
+        callback -- the function that receives the EliminationStep info after each step (default - None)
     """
-    constraints_system = np.array(system)
+    constraints_system = _to_system_array(system, exact)
+    if _is_sparse(constraints_system):
+        # the equations systems usually have few equations, so the T2 table is small
+        constraints_system = constraints_system.toarray()
 
     # First build initial T1 and T2 matrices
     # T1 is a matrix with ones on the main diagonal
-    T1 = [np.eye(constraints_system.shape[1])]
+    T1 = np.eye(constraints_system.shape[1], dtype=constraints_system.dtype if exact else float)
 
     # T2 is a transposed matrix of the initial matrix formed by the constraints system
-    T2 = [constraints_system.transpose().copy()]
+    T2 = constraints_system.transpose().copy()
+
+    # the tables history is kept only to print it
+    history = ([T1], [T2]) if __PRINT_DEBUG else None
+    step_index = 0
 
-    current_index = 0
-    next_index = 1
+    while np.any(T2 != 0):
+        started = time.time()
+        rows_in = T1.shape[0]
 
-    while np.any(T2[current_index] != 0):
         # No choose the main column
-        main_column = __get_main_column_index_simple(T2[current_index])
+        main_column = __get_main_column_index_simple(T2)
         if __PRINT_DEBUG:
             print "----> Main colum is ", main_column
         # Copy to a new T1 and T2 rows from T1 and T2 that are intersected
         # with the main column by zero elements
-        T1.append(np.zeros((0, T1[current_index].shape[1]), dtype=T1[current_index].dtype))
-        T2.append(np.zeros((0, T2[current_index].shape[1]), dtype=T2[current_index].dtype))
-        rows_to_modify = []
-
-        for index, row in enumerate(T2[current_index]):
-            if (T2[current_index][index, main_column] == 0):
-                #copy this row into a new T
-                T1[next_index] = np.vstack((T1[next_index], T1[current_index][index]))
-                T2[next_index] = np.vstack((T2[next_index], row))
-                if __PRINT_DEBUG:
-                    print "Copying row to the new table: ", index
-            else:
-                rows_to_modify.append(index)
-
-        # Not find all pairs from rows_to_modify where the sign on main column are different
-        pairs = list(iter.combinations(rows_to_modify, 2))
-        valid_pairs = []
-
-        for i, j in pairs:
-            main_i = T2[current_index][i, main_column]
-            main_j = T2[current_index][j, main_column]
-
-            if ((main_i != 0) & (main_j != 0) & (cmp(main_i, 0) != cmp(main_j, 0))):
-                # also need to check that there are zero columns in the T1 for given pair
-                columns = np.where((T1[current_index][i] == 0) & (T1[current_index][j] == 0))[0]
-
-                # check whether there is another row (except i,j) in T1 which intersect all the columns with zereos
-                tmp = np.delete(T1[current_index][:, columns], [i, j], 0)
-
-                if ((np.where(np.all(tmp == 0, axis=1))[0].size == 0) or (len(pairs) == 0)):
-                    valid_pairs.append([i, j])
-
-        for i, j in valid_pairs:
-            if __PRINT_DEBUG:
-                print "Checking row pair: ", (i, j)
-            #build linear combinations for valid pairs to have zeros on main column
-            coef_j = abs(T2[current_index][j][main_column])
-            coef_i = abs(T2[current_index][i][main_column])
-            coefs = np.array([coef_i, coef_j])
-
-            # trying to reduce coefs
-            min = coefs.min()
-            if (np.all(coefs % min == 0)):
-                coefs = coefs / min
-
-            new_row_T1 = T1[current_index][i] * coefs[1] + T1[current_index][j] * coefs[0]
-            new_row_T2 = T2[current_index][i] * coefs[1] + T2[current_index][j] * coefs[0]
-            T1[next_index] = np.vstack((T1[next_index], new_row_T1))
-            T2[next_index] = np.vstack((T2[next_index], new_row_T2))
-
-        current_index = current_index + 1
-        next_index = next_index + 1
-
-    if (T1[-1].size == 0):
-        # return zero solution
-        result = T1[-2]
-        result.fill(0)
-    else:
-        result = T1[-1]
+        zero_rows = T2[:, main_column] == 0
+        next_T1 = _TableBuffer(T1.shape[1], T1.dtype, T1.shape[0])
+        next_T2 = _TableBuffer(T2.shape[1], T2.dtype, T2.shape[0])
+        next_T1.extend(T1[zero_rows])
+        next_T2.extend(T2[zero_rows])
+        if __PRINT_DEBUG:
+            print "Copying rows to the new table: ", np.where(zero_rows)[0]
+
+        # Now find all pairs of rows where the signs on main column are different
+        # and combine the adjacent ones in one batch
+        first, second = _get_opposite_sign_pairs(T2[:, main_column])
+        pairs_considered = len(first)
+        rows_T1, rows_T2 = _combine_equation_pairs(T1, T2, main_column, first, second, exact)
+        next_T1.extend(rows_T1)
+        next_T2.extend(rows_T2)
+
+        predicted_rows = np.count_nonzero(zero_rows) + pairs_considered
+        actual_rows = next_T1.rows_count
+        if next_T1.rows_count == 0:
+            _report_step(stats, callback, EliminationStep(
+                step_index, main_column, rows_in, 0, pairs_considered, 0,
+                predicted_rows, 0, 0, time.time() - started))
+
+            # return zero solution
+            T1 = np.zeros_like(T1)
+            T2 = next_T2.table()
+            if history:
+                history[0].append(next_T1.table())
+                history[1].append(T2)
+            break
+
+        T1 = next_T1.table()
+        T2 = next_T2.table()
+        if exact:
+            T1, T2 = _normalize_integer_rows(T1, T2)
+
+        duplicates_removed = 0
+        if deduplicate:
+            T1, T2, duplicates_removed = _remove_duplicate_rows(T1, T2, exact)
+
+        _report_step(stats, callback, EliminationStep(
+            step_index, main_column, rows_in, T1.shape[0], pairs_considered,
+            len(rows_T1), predicted_rows, actual_rows, duplicates_removed, time.time() - started))
+        step_index += 1
 
+        if history:
+            history[0].append(T1)
+            history[1].append(T2)
+
+    result = T1.copy()
     reduce_table(result)
     if __PRINT_DEBUG:
-        __print_T(T1, T2)
+        __print_T(*history)
 
     return result
 
 
-def find_sfs_of_even_inequalities_system(system):
+def find_sfs_of_even_inequalities_system(system, exact=False, main_column_strategy="first", deduplicate=True,
+                                         remove_redundant=False, workers=None, stats=None, callback=None):
     """
     Calculates the system of the fundamental solutions using the Chernikov method for the even linear system of inequalities
 
     Keyword arguments:
-        system -- constraints matrix
+        system -- constraints matrix. The T2 tables of the scipy.sparse matrix are kept sparse in the float mode
+        exact -- use the exact integer arithmetic. The system should have the integer coefs (default - False)
+        main_column_strategy -- the heuristic that selects the main column on each step (default - "first"):
+            "first" - the first column with the positive elements;
+            "min_product" - the column with the minimal product of the positive and negative elements counts;
+            "fewest_rows" - the column that gives the fewest rows of the next table;
+            or the function (T2, is_adjacent) -> (main_column, predicted_rows_count), where
+            is_adjacent(first, second) gets the boolean mask of the adjacent row pairs.
+        deduplicate -- normalize the rows of each table and remove the duplicates (default - True)
+        remove_redundant -- remove the not extreme solutions from the fundamental system (default - False)
+        workers -- the number of processes that combine the row pairs (default - None, no processes are used).
+            The processes are used only for the steps with many row pairs. The result is the same.
+        stats -- the SolverStats instance which collects the elimination steps info (default - None)
+        callback -- the function that receives the EliminationStep info after each step (default - None)
     """
+    state = _start_elimination(system, exact)
+    _eliminate(state, exact, main_column_strategy, deduplicate, workers, stats, callback)
+    result = state.get_fundamental_system()
+
+    if remove_redundant:
+        result, redundant_removed = remove_redundant_solutions(result, system, exact)
+        if stats is not None:
+            stats.redundant_removed = redundant_removed
+
+    return result
+
+
+class _EliminationState(object):
+    """
+    The state of the Chernikov method for the even inequalities system: the last T1 and T2 tables
+    and the indexes of the saved main columns. Allows to add new constraints to the solved system.
+    """
+
+    def __init__(self, T1, T2, saved_main_column_indexes=(), zero_solution=False):
+        self.T1 = T1
+        self.T2 = T2
+        self.saved_main_column_indexes = list(saved_main_column_indexes)
+        self.zero_solution = zero_solution
+
+    @property
+    def nbytes(self):
+        """
+        Gets the memory used by the tables.
+        """
+        return sum(_get_nbytes(table) for table in (self.T1, self.T2))
+
+    def get_fundamental_system(self):
+        """
+        Gets the fundamental system of solutions with the reduced rows.
+        """
+        # searching GCD
+        result = self.T1.copy()
+        reduce_table(result)
+        return result
+
 
+def _start_elimination(system, exact=False):
+    """
+    Builds the initial state of the Chernikov method for the constraints system.
+    """
     # casting to array.
-    constraints_system = np.array(system)
+    constraints_system = _to_system_array(system, exact)
 
     # First build initial T1 and T2 matrices
     # T1 is a matrix with ones on the main diagonal
-    T1 = [np.eye(constraints_system.shape[1])]
+    T1 = np.eye(constraints_system.shape[1], dtype=constraints_system.dtype if exact else float)
 
     # T2 is a transposed matrix of the initial matrix formed by the constraints system
-    T2 = [constraints_system.transpose().copy()]
+    T2 = constraints_system.transpose().copy()
+    if _is_sparse(T2):
+        T2 = T2.tocsr()
+    return _EliminationState(T1, T2)
+
+
+def _append_constraints(state, constraints, exact=False):
+    """
+    Builds the state of the Chernikov method for the system extended with the new constraints.
+    The new state should be eliminated further. The provided state is not changed.
+    """
+    if state.zero_solution:
+        return state
 
-    current_index = 0
-    next_index = 1
+    constraints = _to_system_array(constraints, exact)
+    if not _is_sparse(constraints):
+        constraints = constraints.reshape(-1, state.T1.shape[1])
+
+    # the rows of T2 are the values of the constraints on the rows of T1
+    values = _get_constraint_values(state.T1, constraints, exact)
+    if _is_sparse(state.T2):
+        T2 = sparse.hstack((state.T2, sparse.csr_matrix(values)), format="csr")
+    else:
+        T2 = np.hstack((state.T2, values))
+    return _EliminationState(state.T1, T2, state.saved_main_column_indexes)
+
+
+def _get_constraint_values(T1, constraints, exact=False):
+    """
+    Calculates the values of the constraints on the rows of T1.
+    """
+    if not exact:
+        return _dot_transposed(T1, constraints)
+
+    if T1.dtype != object:
+        bound = np.dot(np.abs(T1).astype(float), np.abs(constraints.T).astype(float))
+        if np.all(bound < _INT64_BOUND):
+            return np.dot(T1, constraints.T)
+
+    return _to_int64_if_fits(np.dot(T1.astype(object), constraints.T.astype(object)))
+
+
+def _eliminate(state, exact=False, main_column_strategy="first", deduplicate=True, workers=None, stats=None,
+               callback=None):
+    """
+    Performs the elimination steps of the Chernikov method until all the constraints are satisfied.
+    The state is updated in place.
+    """
+    if state.zero_solution:
+        return
+
+    select_main_column = _get_main_column_strategy(main_column_strategy)
+    T1, T2 = state.T1, state.T2
+
+    # the tables history is kept only to print it
+    history = ([T1], [T2]) if __PRINT_DEBUG else None
 
     # stores all the previous main columns
-    saved_main_column = []
-    saved_main_column_indexes = []
+    saved_main_column_indexes = state.saved_main_column_indexes
+    step_index = 0
+
+    positive, negative = _get_columns_signs(T2)
+    while positive.any():
+        started = time.time()
+        rows_in = T1.shape[0]
 
-    while np.any(T2[current_index] > 0):
         # replace negative all negative columns with zero
-        for index, column in enumerate(T2[current_index].T):
-            if (column < 0).all() and not(index in saved_main_column_indexes):
-                T2[current_index][:, index] = 0
+        negative_columns = negative == T2.shape[0]
+        negative_columns[saved_main_column_indexes] = False
+        _zero_columns(T2, negative_columns)
+
+        # forming the temporary T1 table which includes the saved main rows
+        temp_T1 = __build_adjusted_T1(T1, T2, saved_main_column_indexes)
+        is_adjacent = _get_adjacency_test(temp_T1, T1.shape[1])
 
-        main_column = __get_positive_main_column_index(T2[current_index])
+        main_column, predicted_rows = select_main_column(T2, is_adjacent)
         if __PRINT_DEBUG:
             print "Main column is: ", main_column
 
         # Copy to a new T1 and T2 rows from T1 and T2 that are intersected
         # with the main column by negative (<=) elements
-        T1.append(np.zeros((0, T1[current_index].shape[1]), dtype=T1[current_index].dtype))
-        T2.append(np.zeros((0, T2[current_index].shape[1]), dtype=T2[current_index].dtype))
+        next_T1 = _TableBuffer(T1.shape[1], T1.dtype, T1.shape[0])
+        next_T2 = _new_table_buffer(T2)
 
-        for index, row in enumerate(T2[current_index]):
-            if (T2[current_index][index, main_column] <= 0):
-                #copy this row into a new T
-                T1[next_index] = np.vstack((T1[next_index], T1[current_index][index]))
-                T2[next_index] = np.vstack((T2[next_index], row))
+        main_values = _get_column(T2, main_column)
+        copied_rows = main_values <= 0
+        next_T1.extend(T1[copied_rows])
+        next_T2.extend(T2[copied_rows])
 
-        # find all 'valid pairs'
-        pairs = list(iter.combinations(range(T2[current_index].shape[0]), 2))
+        # find all the row pairs with the opposite signs on the main column
+        first, second = _get_opposite_sign_pairs(main_values)
         if __PRINT_DEBUG:
-            print "All row pairs to check: ", pairs
+            print "All row pairs to check: ", zip(first, second)
+
+        parallel = workers is not None and workers > 1 and len(first) >= _PARALLEL_PAIRS_THRESHOLD
+        if parallel and T1.dtype != object and T2.dtype != object and not _is_sparse(T2):
+            chunks = _combine_adjacent_pairs_parallel(T1, T2, temp_T1, main_column, first, second, exact, workers)
+        else:
+            chunks = [_combine_adjacent_pairs(T1, T2, main_column, first, second, is_adjacent, exact)]
+
+        pairs_accepted = 0
+        for rows_T1, rows_T2 in chunks:
+            next_T1.extend(rows_T1)
+            next_T2.extend(rows_T2)
+            pairs_accepted += len(rows_T1)
+
+        T1 = next_T1.table()
+        T2 = next_T2.table()
+        if history:
+            history[0].append(T1)
+            history[1].append(T2)
 
-        # forming the temporary T1 table which includes the saved main rows
-        temp_T1 = __build_adjusted_T1(T1[current_index], T2[current_index], saved_main_column_indexes)
-
-        for i, j in pairs:
-            main_i = T2[current_index][i, main_column]
-            main_j = T2[current_index][j, main_column]
-            valid_pairs = []
-            if ((main_i != 0) & (main_j != 0) & (cmp(main_i, 0) != cmp(main_j, 0))):
-                if (temp_T1.shape[0] <= 2):
-                    valid_pairs.append([i, j])
-                else:
-                    # also need to check that there are zero columns in the T1 for given pair
-                    columns = np.where((temp_T1[i] == 0) & (temp_T1[j] == 0))[0]
-
-                    # check whether there is another row (except i,j) in T1 which intersect all the columns with zereos
-                    tmp = np.delete(temp_T1[:, columns], [i, j], 0)
-                    if np.where(np.all(tmp == 0, axis=1))[0].size == 0 and tmp.shape[1] > 1:
-                        valid_pairs.append([i, j])
-
-                for i, j in valid_pairs:
-                    if __PRINT_DEBUG:
-                        print "Performing calcualtions for pair: ", (i, j)
-                    #build linear combinations for valid pairs to have zeros on main column
-                    coef_j = abs(T2[current_index][j][main_column])
-                    coef_i = abs(T2[current_index][i][main_column])
-                    coefs = np.array([coef_i, coef_j])
-
-                    # trying to reduce coefs
-                    d = gcd(coef_i, coef_j)
-                    coefs = coefs / d
-
-                    new_row_T1 = T1[current_index][i] * coefs[1] + T1[current_index][j] * coefs[0]
-                    new_row_T2 = T2[current_index][i] * coefs[1] + T2[current_index][j] * coefs[0]
-                    T1[next_index] = np.vstack((T1[next_index], new_row_T1))
-                    T2[next_index] = np.vstack((T2[next_index], new_row_T2))
+        if __PRINT_DEBUG:
+            print "Predicted rows count: {0}, actual rows count: {1}".format(predicted_rows, T1.shape[0])
+        actual_rows = T1.shape[0]
 
         # replace by -1 all the non-zero element of the main column. also replace all the saved main
-        for column_index in saved_main_column_indexes + [main_column]:
-            T2[next_index][np.where(T2[next_index][:, column_index] != 0), column_index] = -1
-
-        if  np.all((T2[next_index] > 0), axis=0).any():
+        _set_marker_columns(T2, saved_main_column_indexes + [main_column])
+
+        if exact:
+            T1, T2 = _normalize_integer_rows(T1, T2, saved_main_column_indexes + [main_column])
+
+        duplicates_removed = 0
+        if deduplicate:
+            if not exact:
+                _normalize_float_rows(T1, T2, saved_main_column_indexes + [main_column])
+            T1, T2, duplicates_removed = _remove_duplicate_rows(T1, T2, exact)
+            if history:
+                history[0][-1], history[1][-1] = T1, T2
+
+        _report_step(stats, callback, EliminationStep(
+            step_index, main_column, rows_in, T1.shape[0], len(first), pairs_accepted, predicted_rows,
+            actual_rows, duplicates_removed, time.time() - started))
+        step_index += 1
+
+        positive, negative = _get_columns_signs(T2)
+        if (positive == T2.shape[0]).any():
             # some column in the T2 is strickly positive"
             # in this case we have zero solution
-            T1[next_index] = np.zeros_like(T1[next_index])
+            T1 = np.zeros_like(T1)
+            state.zero_solution = True
+            if history:
+                history[0][-1] = T1
             break
 
         # saving the main column
-        c = T2[next_index][:, main_column].copy()
-        c = c.reshape(c.shape[0], 1)
-        saved_main_column.append(c)
         saved_main_column_indexes.append(main_column)
 
-        # going to the next tables
-        current_index = current_index + 1
-        next_index = next_index + 1
+    state.T1, state.T2 = T1, T2
+
+    if __PRINT_DEBUG:
+        __print_T(*history)
+
+
+def _combine_adjacent_pairs(T1, T2, main_column, first, second, is_adjacent, exact=False):
+    """
+    Builds the rows of the next tables from the row pairs that have the opposite signs on the main column.
+    Only the adjacent pairs are combined.
 
-    # searching GCD
-    reduce_table(T1[-1])
+    Returns the new rows of T1 and T2.
+    """
+    # find all 'valid pairs'
+    valid = is_adjacent(first, second)
+    first, second = first[valid], second[valid]
 
     if __PRINT_DEBUG:
-        __print_T(T1, T2)
-    # return the last left table
-    return T1[-1]
+        print "Performing calcualtions for pairs: ", zip(first, second)
+
+    #build linear combinations for valid pairs to have zeros on main column
+    main_values = _get_column(T2, main_column)
+    coefs_i = np.abs(main_values[first])
+    coefs_j = np.abs(main_values[second])
+
+    # trying to reduce coefs
+    if exact:
+        d = _integer_gcd(coefs_i, coefs_j)
+        coefs_i, coefs_j = coefs_i // d, coefs_j // d
+    else:
+        d = _gcd_ufunc(coefs_i, coefs_j).astype(T2.dtype)
+        coefs_i, coefs_j = coefs_i / d, coefs_j / d
+
+    return (_combine_rows(T1, first, second, coefs_i, coefs_j, exact),
+            _combine_rows(T2, first, second, coefs_i, coefs_j, exact))
+
+
+def _combine_equation_pairs(T1, T2, main_column, first, second, exact=False):
+    """
+    Builds the rows of the next tables of the equations system from the row pairs that have
+    the opposite signs on the main column. Only the adjacent pairs are combined.
+
+    Returns the new rows of T1 and T2.
+    """
+    # the pair is adjacent when there is no other row of T1 which zeros cover the common zeros of the pair
+    valid = _get_adjacent_pairs_mask(T1 == 0, first, second)
+    first, second = first[valid], second[valid]
+
+    if __PRINT_DEBUG:
+        print "Performing calcualtions for pairs: ", zip(first, second)
+
+    #build linear combinations for valid pairs to have zeros on main column
+    coefs_i = np.abs(T2[first, main_column])
+    coefs_j = np.abs(T2[second, main_column])
+
+    # trying to reduce coefs
+    if exact:
+        d = _integer_gcd(coefs_i, coefs_j)
+        coefs_i, coefs_j = coefs_i // d, coefs_j // d
+    else:
+        # the coefs are divided by the smaller one only when both are its multiples
+        d = np.minimum(coefs_i, coefs_j)
+        d[(coefs_i % d != 0) | (coefs_j % d != 0)] = 1
+        coefs_i, coefs_j = coefs_i / d, coefs_j / d
+
+    return (_combine_rows(T1, first, second, coefs_i, coefs_j, exact),
+            _combine_rows(T2, first, second, coefs_i, coefs_j, exact))
+
+
+def _combine_adjacent_pairs_parallel(T1, T2, temp_T1, main_column, first, second, exact, workers):
+    """
+    Combines the row pairs in the processes pool. The tables are passed to the processes
+    through the shared memory. Each process checks and combines the contiguous chunk of pairs,
+    so the concatenated chunks are the same as the rows built by _combine_adjacent_pairs.
+
+    Returns the list of the (T1 rows, T2 rows) chunks.
+    """
+    shared_tables = [_to_shared_array(table) for table in (T1, T2, temp_T1, first, second)]
+    bounds = np.linspace(0, len(first), workers * 4 + 1).astype(int)
+
+    pool = multiprocessing.Pool(workers, _init_pairs_worker, (shared_tables, main_column, T1.shape[1], exact))
+    try:
+        return pool.map(_combine_pairs_chunk, zip(bounds[:-1], bounds[1:]))
+    finally:
+        pool.close()
+        pool.join()
+
+
+def _to_shared_array(array):
+    """
+    Copies the array to the shared memory. Returns the description of the shared array.
+    """
+    array = np.ascontiguousarray(array)
+    shared = RawArray(ctypes.c_char, max(array.nbytes, 1))
+    _from_shared_array(shared, array.dtype.str, array.shape)[...] = array
+    return shared, array.dtype.str, array.shape
+
+
+def _from_shared_array(shared, dtype, shape):
+    """
+    Gets the array that uses the shared memory. No data is copied.
+    """
+    dtype = np.dtype(dtype)
+    nbytes = dtype.itemsize * int(np.prod(shape))
+    return np.frombuffer(shared, dtype=np.uint8)[:nbytes].view(dtype).reshape(shape)
+
+
+def _init_pairs_worker(shared_tables, main_column, variables_count, exact):
+    global _worker_tables
+    _worker_tables = [_from_shared_array(*table) for table in shared_tables], main_column, variables_count, exact
+
+
+def _combine_pairs_chunk(bounds):
+    (T1, T2, temp_T1, first, second), main_column, variables_count, exact = _worker_tables
+    start, stop = bounds
+    is_adjacent = _get_adjacency_test(temp_T1, variables_count)
+    return _combine_adjacent_pairs(T1, T2, main_column, first[start:stop], second[start:stop], is_adjacent, exact)
+
+
+def _get_opposite_sign_pairs(column):
+    """
+    Gets the pairs of the rows (i, j), i < j, which have the opposite signs in the column.
+    The pairs are ordered in the same way as itertools.combinations orders them.
+
+    Returns the arrays of the first and the second indexes of the pairs.
+    """
+    positive = np.where(column > 0)[0]
+    negative = np.where(column < 0)[0]
+    first = np.minimum.outer(positive, negative).ravel()
+    second = np.maximum.outer(positive, negative).ravel()
+    order = np.lexsort((second, first))
+    return first[order], second[order]
+
+
+def _get_adjacency_test(temp_T1, variables_count):
+    """
+    Gets the function that checks which row pairs of the table are adjacent.
+    The rows are the extreme rays of the cone in the n-dimensional space (n = variables_count) and their
+    zero columns are the active constraints. The adjacent extreme rays share at least n - 2 active constraints,
+    so the adjacent rows have at least (n - 2) common zero columns and there is no other row which zeros
+    cover all the common zero columns of the pair.
+    """
+    if temp_T1.shape[0] <= 2:
+        return lambda first, second: np.ones(len(first), dtype=bool)
+
+    zeros = temp_T1 == 0
+    return lambda first, second: _get_adjacent_pairs_mask(zeros, first, second, variables_count - 2)
+
+
+def _get_adjacent_pairs_mask(zeros, first, second, min_common_zeros=0):
+    """
+    Checks which of the row pairs are adjacent. The pair is adjacent when there is no other row
+    that has zeros in all the columns where both rows of the pair have zeros.
+
+    Keyword arguments:
+        zeros -- the boolean matrix with the zeros pattern of the table
+        first, second -- the indexes of the pairs rows
+        min_common_zeros -- the minimal number of the common zero columns of the adjacent pair
+    """
+    mask = np.empty(len(first), dtype=bool)
+    nonzeros = (~zeros).astype(np.float32)
+
+    # the pairs are checked in blocks to bound the size of the temporary (rows x pairs) matrix
+    block_size = max(1, _ADJACENCY_BLOCK_SIZE // max(zeros.shape[0], 1))
+    for start in xrange(0, len(first), block_size):
+        stop = start + block_size
+        common = zeros[first[start:stop]] & zeros[second[start:stop]]
+
+        # the number of the common zero columns where the row has non-zero elements.
+        # only the rows of the pair itself should not have such columns.
+        overlaps = np.dot(nonzeros, common.T.astype(np.float32))
+        covering_rows = np.sum(overlaps == 0, axis=0)
+        mask[start:stop] = (covering_rows == 2) & (common.sum(axis=1) >= min_common_zeros)
+
+    return mask
+
+
+def _combine_rows(table, first, second, coefs_i, coefs_j, exact=False):
+    """
+    Builds the linear combinations of the rows pairs: table[first] * coefs_j + table[second] * coefs_i.
+    In the exact mode only the rows which may overflow int64 are calculated with Python integers,
+    but the result holds all the rows as Python integers then (see _TableBuffer.extend).
+    """
+    if _is_sparse(table):
+        return sparse.diags(coefs_j) * table[first] + sparse.diags(coefs_i) * table[second]
+
+    coefs_i = coefs_i[:, np.newaxis]
+    coefs_j = coefs_j[:, np.newaxis]
+    if not exact or table.dtype == object:
+        return table[first] * coefs_j + table[second] * coefs_i
+
+    bound = np.abs(table[first]) * coefs_j.astype(float) + np.abs(table[second]) * coefs_i.astype(float)
+    overflow = np.any(bound >= _INT64_BOUND, axis=1)
+    if not overflow.any():
+        return table[first] * coefs_j + table[second] * coefs_i
+
+    rows = np.empty((len(first), table.shape[1]), dtype=object)
+    safe = ~overflow
+    rows[safe] = table[first[safe]] * coefs_j[safe] + table[second[safe]] * coefs_i[safe]
+    rows[overflow] = (table[first[overflow]].astype(object) * coefs_j[overflow].astype(object) +
+                      table[second[overflow]].astype(object) * coefs_i[overflow].astype(object))
+    return rows
+
+
+def _normalize_integer_rows(T1, T2, marker_columns=()):
+    """
+    Divides the rows of the integer T1 and T2 tables by the GCD of the T1 row.
+    The T2 marker columns (filled with -1 and 0) are not changed.
+
+    Returns the normalized tables. Tables of Python integers are casted back to int64 when possible.
+    """
+    d = _get_rows_gcd(T1)
+    d[d == 0] = 1
+    d = d[:, np.newaxis]
+
+    columns = np.ones(T2.shape[1], dtype=bool)
+    columns[list(marker_columns)] = False
+
+    T1 //= d
+    T2[:, columns] //= d
+    return _to_int64_if_fits(T1), _to_int64_if_fits(T2)
+
+
+def _get_rows_gcd(table):
+    """
+    Gets the GCD of the elements of each row of the integer table.
+    """
+    if table.dtype == object:
+        if table.shape[1] == 0:
+            return np.zeros(table.shape[0], dtype=object)
+        return _gcd_ufunc.reduce(np.abs(table), axis=1)
+    return np.gcd.reduce(table, axis=1)
+
+
+def _integer_gcd(a, b):
+    """
+    Gets the element-wise GCD of the integer arrays.
+    """
+    if a.dtype == object or b.dtype == object:
+        return _gcd_ufunc(np.abs(a), np.abs(b))
+    return np.gcd(a, b)
+
+
+def _normalize_float_rows(T1, T2, marker_columns=()):
+    """
+    Divides the rows of the float T1 and T2 tables by the GCD of the T1 row if the T1 row is integer.
+    The T2 marker columns (filled with -1 and 0) are not changed. The tables are changed in place.
+    """
+    integer_rows = np.all((T1 == np.round(T1)) & (np.abs(T1) < _FLOAT_INTEGER_BOUND), axis=1)
+    if not integer_rows.any():
+        return
+
+    d = np.ones(T1.shape[0], dtype=np.int64)
+    d[integer_rows] = np.gcd.reduce(T1[integer_rows].astype(np.int64), axis=1)
+    d[d == 0] = 1
+    d = d[:, np.newaxis]
+
+    columns = np.ones(T2.shape[1], dtype=bool)
+    columns[list(marker_columns)] = False
+
+    T1 /= d
+    if _is_sparse(T2):
+        # the non-zero elements are divided by the GCD of their rows
+        d = np.repeat(d.ravel(), np.diff(T2.indptr))
+        scaled = columns[T2.indices]
+        if T2.dtype.kind in "iu":
+            T2.data[scaled] //= d[scaled]
+        else:
+            T2.data[scaled] /= d[scaled]
+    elif T2.dtype.kind in "iu":
+        # the integer values of the constraints are divisible by the GCD of the integer T1 row
+        T2[:, columns] //= d
+    else:
+        T2[:, columns] /= d
+
+
+def _remove_duplicate_rows(T1, T2, exact=False):
+    """
+    Removes the rows which T1 parts duplicate the previous rows.
+    The rows should be normalized, so the proportional rows are equal.
+
+    Returns the tables without duplicates and the number of the removed rows.
+    """
+    unique = _get_unique_rows_mask(T1)
+    duplicates_count = len(unique) - np.sum(unique)
+    if duplicates_count:
+        T1, T2 = T1[unique], T2[unique]
+
+    return T1, T2, duplicates_count
+
+
+def _get_unique_rows_mask(table):
+    """
+    Gets the mask of the first occurrences of the table rows.
+    """
+    mask = np.zeros(table.shape[0], dtype=bool)
+    if table.dtype == object:
+        seen = set()
+        for index, row in enumerate(table):
+            key = tuple(row)
+            if key not in seen:
+                seen.add(key)
+                mask[index] = True
+        return mask
+
+    # the rows are hashed as the raw bytes. adding zero replaces -0.0 with 0.0
+    rows = np.ascontiguousarray(table + 0)
+    keys = rows.view(np.dtype((np.void, rows.dtype.itemsize * rows.shape[1]))).ravel()
+    _, first_occurrences = np.unique(keys, return_index=True)
+    mask[first_occurrences] = True
+    return mask
+
+
+def remove_redundant_solutions(fundamental_system, system, exact=False):
+    """
+    Removes the solutions that are not extreme from the fundamental system.
+    The solution is not extreme if some other solution satisfies as equalities all
+    the constraints (including x_i >= 0) that the solution satisfies as equalities.
+
+    Returns the fundamental system without the redundant solutions and the number of the removed solutions.
+    """
+    if fundamental_system.shape[0] < 2 or not np.any(fundamental_system):
+        return fundamental_system, 0
+
+    constraints = _to_system_array(system, exact)
+    if not exact:
+        constraints = constraints.astype(float)
+
+    values = _dot_transposed(fundamental_system, constraints)
+    if exact:
+        active = values == 0
+    else:
+        scale = _dot_transposed(np.abs(fundamental_system), abs(constraints))
+        active = np.abs(values) <= _ZERO_TOLERANCE * scale
+
+    zeros = np.hstack((fundamental_system == 0, active))
+
+    # covering[i, j] is the number of the zero columns of the solution j where the solution i is not zero
+    covering = np.dot((~zeros).astype(np.float32), zeros.T.astype(np.float32))
+    np.fill_diagonal(covering, 1)
+    redundant = np.any(covering == 0, axis=0)
+
+    return fundamental_system[~redundant], np.sum(redundant)
+
+
+def _to_int64_if_fits(table):
+    """
+    Casts the table of Python integers to int64 if all the elements are in the int64 range.
+    The table is casted as a whole, so one big row keeps the whole table on the Python integers path
+    until the normalization brings it back to the int64 range.
+    """
+    if table.dtype != object or (table.size and np.abs(table).max() >= 2 ** 63):
+        return table
+    return table.astype(np.int64)
+
+
+def _to_integer_array(system):
+    """
+    Casts the constraints system to the int64 array. Raises ValueError if some coef is not integer.
+    """
+    constraints_system = system.toarray() if _is_sparse(system) else np.array(system)
+    if constraints_system.dtype.kind in "iub":
+        return constraints_system.astype(np.int64)
+
+    if constraints_system.dtype.kind != "f" or np.any(constraints_system != np.round(constraints_system)):
+        raise ValueError("The exact mode requires the integer coefs of the constraints system")
+
+    if constraints_system.size and np.abs(constraints_system).max() >= 2 ** 63:
+        raise ValueError("The constraints system coefs are out of the int64 range")
+
+    return constraints_system.astype(np.int64)
+
+
+def _is_sparse(table):
+    """
+    Checks whether the table is the scipy.sparse matrix.
+    """
+    return sparse is not None and sparse.issparse(table)
+
+
+def _get_nbytes(table):
+    """
+    Gets the memory used by the array or the scipy.sparse matrix.
+    """
+    if _is_sparse(table):
+        table = table.tocsr()
+        return table.data.nbytes + table.indices.nbytes + table.indptr.nbytes
+    return table.nbytes
+
+
+def _copy_system(system):
+    """
+    Copies the constraints system to the array or to the CSR matrix if the system is sparse.
+    """
+    return sparse.csr_matrix(system, copy=True) if _is_sparse(system) else np.array(system)
+
+
+def _to_system_array(system, exact=False):
+    """
+    Casts the constraints system to the array. The sparse system is casted to the CSR matrix
+    in the float mode and to the dense int64 array in the exact mode, as the exact mode may need
+    the Python integers which are not supported by the sparse matrices.
+    """
+    if exact:
+        return _to_integer_array(system)
+
+    if _is_sparse(system):
+        constraints_system = sparse.csr_matrix(system, copy=True)
+        constraints_system.sum_duplicates()
+        constraints_system.eliminate_zeros()
+        return constraints_system
+
+    return np.array(system)
+
+
+def _systems_equal(first, second):
+    """
+    Checks whether the constraints systems are equal. The systems are the arrays or the sparse matrices.
+    """
+    if not _is_sparse(first) and not _is_sparse(second):
+        return np.array_equal(first, second)
+
+    if first is None or second is None or np.shape(first) != np.shape(second):
+        return False
+
+    return (sparse.csr_matrix(first) != sparse.csr_matrix(second)).nnz == 0
+
+
+def _dot_transposed(table, constraints):
+    """
+    Calculates the dense product of the table and the transposed constraints system.
+    """
+    if _is_sparse(constraints):
+        return constraints.dot(table.T).T
+    return np.dot(table, constraints.T)
+
+
+def _get_column(T2, column):
+    """
+    Gets the column of the table as the dense array.
+    """
+    if _is_sparse(T2):
+        return T2[:, column].toarray().ravel()
+    return T2[:, column]
+
+
+def _get_columns_signs(T2):
+    """
+    Gets the numbers of the positive and the negative elements in each column of the table.
+    Only the non-zero elements of the sparse table are checked.
+    """
+    if _is_sparse(T2):
+        positive = np.bincount(T2.indices[T2.data > 0], minlength=T2.shape[1])
+        negative = np.bincount(T2.indices[T2.data < 0], minlength=T2.shape[1])
+        return positive, negative
+
+    return np.sum(T2 > 0, axis=0), np.sum(T2 < 0, axis=0)
+
+
+def _zero_columns(T2, columns):
+    """
+    Replaces the elements of the table columns (given by the boolean mask) with zeros in place.
+    """
+    if _is_sparse(T2):
+        T2.data[columns[T2.indices]] = 0
+        T2.eliminate_zeros()
+    else:
+        T2[:, columns] = 0
+
+
+def _set_marker_columns(T2, columns):
+    """
+    Replaces the non-zero elements of the table columns with -1 in place.
+    """
+    if _is_sparse(T2):
+        T2.data[np.in1d(T2.indices, columns)] = -1
+        return
+
+    for column_index in columns:
+        T2[np.where(T2[:, column_index] != 0), column_index] = -1
 
 
 def reduce_table(T1):
+    if T1.dtype == object or T1.dtype.kind in "iu":
+        # integer tables are reduced by the vectorized GCD
+        d = _get_rows_gcd(T1)
+        d[d == 0] = 1
+        T1 //= d[:, np.newaxis]
+        return
+
     for index, value in enumerate(T1):
         d = reduce(gcd, value)
         if (d != 0):
@@ -316,18 +1307,81 @@ def __get_main_column_index_simple(T2):
     return -1
 
 
-def __get_positive_main_column_index(T2):
-    for index, value in enumerate(T2.T):
-        if (value > 0).any():
-            return index
-    return -1
+def _select_first_column(T2, is_adjacent):
+    """
+    Selects the first column with the positive elements.
+    The predicted rows count does not take into account the adjacency of the rows.
+    """
+    positive, negative = _get_columns_signs(T2)
+    main_column = np.where(positive > 0)[0][0]
+    return main_column, T2.shape[0] - positive[main_column] + positive[main_column] * negative[main_column]
+
+
+def _select_min_product_column(T2, is_adjacent):
+    """
+    Selects the column with the minimal product of the positive and negative elements counts.
+    The predicted rows count does not take into account the adjacency of the rows.
+    """
+    positive, negative = _get_columns_signs(T2)
+    rows_counts = T2.shape[0] - positive + positive * negative
+    candidates = np.where(positive > 0)[0]
+    main_column = candidates[np.argmin(rows_counts[candidates])]
+    return main_column, rows_counts[main_column]
+
+
+def _select_fewest_rows_column(T2, is_adjacent):
+    """
+    Selects the column that gives the fewest rows of the next table.
+    Runs the adjacency test for every candidate column, so the predicted rows count is exact.
+    """
+    best = None
+    for column in np.where(_get_columns_signs(T2)[0] > 0)[0]:
+        values = _get_column(T2, column)
+        first, second = _get_opposite_sign_pairs(values)
+        rows_count = np.sum(values <= 0) + np.sum(is_adjacent(first, second))
+        if best is None or rows_count < best[1]:
+            best = column, rows_count
+
+    return best
+
+
+MAIN_COLUMN_STRATEGIES = {"first": _select_first_column,
+                          "min_product": _select_min_product_column,
+                          "fewest_rows": _select_fewest_rows_column}
+
+
+def _get_main_column_strategy(strategy):
+    """
+    Gets the main column selection function by the strategy name.
+    """
+    if callable(strategy):
+        return strategy
+
+    if strategy not in MAIN_COLUMN_STRATEGIES:
+        raise ValueError("Unknown main column strategy: '{0}'".format(strategy))
+
+    return MAIN_COLUMN_STRATEGIES[strategy]
+
+
+def _get_strategy_name(strategy):
+    """
+    Gets the name of the registered main column strategy given by the name or the function
+    or None if the strategy function is not registered.
+    """
+    if not callable(strategy):
+        return strategy
+
+    for name, function in MAIN_COLUMN_STRATEGIES.items():
+        if function is strategy:
+            return name
+    return None
 
 
 def __print_T(T1, T2):
     """
     Prints the T1 and T2 tables.
     """
-    np.set_printoptions(precision=3, suppress=True, threshold=np.nan)
+    np.set_printoptions(precision=3, suppress=True, threshold=sys.maxsize)
     for t_index in xrange(len(T1)):
         print "Table T[{0}]:".format(t_index)
 
@@ -336,7 +1390,7 @@ def __print_T(T1, T2):
         delimiter = np.zeros((T1[t_index].shape[0], 1))
         delimiter.fill(np.nan)
         result = np.hstack((result, delimiter))
-        result = np.hstack((result, T2[t_index]))
+        result = np.hstack((result, T2[t_index].toarray() if _is_sparse(T2[t_index]) else T2[t_index]))
 
         print result
         print "-" * (T1[t_index].shape[1] + T2[t_index].shape[1])
@@ -349,6 +1403,8 @@ def __build_adjusted_T1(T1, T2, saved_columns_indexes):
 
     # getting the actual saved columns from the T2
     saved_columns = T2[:, saved_columns_indexes]
+    if _is_sparse(saved_columns):
+        saved_columns = saved_columns.toarray()
     temp_T1 = np.hstack((temp_T1, saved_columns))
     return temp_T1
 
@@ -361,6 +1417,9 @@ def lcm(a, b):
     return a * b / gcd(a, b)
 
 
+_gcd_ufunc = np.frompyfunc(gcd, 2, 1)
+
+
 if __name__ == '__main__':
     a = np.float_([[-1, 0, 0, 1],
                    [0, -1, 0, 1],
@@ -0,0 +1,148 @@
+__author__ = "Alex Baranov"
+
+import time
+import heapq
+import numpy as np
+from collections import namedtuple
+
+from permutations import PermutationSet
+from constraint_system import ConstraintSystem
+
+# the result of the branch and bound search: the best found point and its goal function value (None if no valid
+# point was found), the lower bound of the minimum, the gap between the found value and the lower bound,
+# the number of the expanded nodes, the search time in seconds and whether the found point is proved to be optimal
+BranchAndBoundResult = namedtuple("BranchAndBoundResult",
+                                  ["point", "func_value", "lower_bound", "gap", "nodes", "elapsed", "optimal"])
+
+# the tolerance of the constraints bounds, so the rounding errors do not prune the feasible subtrees
+_TOLERANCE = 1e-9
+
+
+def find_minimum_with_branch_and_bound(goal_func,
+                                       system,
+                                       permutation_set,
+                                       order="best",
+                                       node_limit=None,
+                                       time_limit=None):
+    """
+    Gets the minimum of the linear function on the permutation set with the linear constraints.
+    The values are assigned to the positions one by one (the positions with the greater goal function coefs first).
+    The subtree is pruned if the minimum of the linear function on the permutations of the remaining elements
+    shows that the goal function can not be improved or some constraint can not be satisfied.
+
+    Parameters:
+     - goal_func - the coefs of the linear goal function
+     - system - the constraints system, each row is [a_1, ..., a_n, b] for a_1*x_1 + ... + a_n*x_n + b <= 0
+     - permutation_set - the PermutationSet
+     - order - the order of the nodes: "best" (the node with the least bound first) or "depth" (depth-first)
+     - node_limit - the maximal number of the expanded nodes (default - None, no limit)
+     - time_limit - the maximal search time in seconds (default - None, no limit)
+
+    Returns the BranchAndBoundResult. If the search is stopped by a limit the result contains the best found point
+    and the gap to the lower bound of the minimum.
+    """
+    if order not in ("best", "depth"):
+        raise ValueError("Unknown nodes order: {0}".format(order))
+
+    if not isinstance(system, ConstraintSystem):
+        system = ConstraintSystem(system, len(goal_func))
+
+    started = time.time()
+    coefs = np.array(goal_func, dtype=float)
+    n = len(coefs)
+
+    # the positions are assigned in the order of the decreasing absolute coefs
+    positions = sorted(xrange(n), key=lambda i: -abs(coefs[i]))
+    coefs = coefs[positions]
+    A, b = system.A[:, positions], system.b
+
+    best_values, best_func_value = None, None
+    nodes, counter = 0, 0
+
+    # the node is (bound, counter, assigned values, sorted remaining elements, goal function and constraints values
+    # of the assigned part). The counter keeps the order of the nodes with the equal bounds.
+    root = _get_node(coefs, A, b, 0.0, np.zeros(len(b)), (), tuple(permutation_set.generation_elements), counter)
+    opened = [root] if root is not None else []
+
+    while opened:
+        if node_limit is not None and nodes >= node_limit:
+            break
+        if time_limit is not None and time.time() - started >= time_limit:
+            break
+
+        bound, _, values, remaining, func_value, lhs = heapq.heappop(opened) if order == "best" else opened.pop()
+        if best_values is not None and bound >= best_func_value:
+            continue
+        nodes += 1
+
+        k = len(values)
+        children = []
+        for i, element in enumerate(remaining):
+            if i > 0 and remaining[i - 1] == element:
+                # the equal elements give the same subtrees
+                continue
+
+            counter += 1
+            child = _get_node(coefs, A, b,
+                              func_value + coefs[k] * element,
+                              lhs + A[:, k] * element,
+                              values + (element,),
+                              remaining[:i] + remaining[i + 1:],
+                              counter)
+            if child is None or (best_values is not None and child[0] >= best_func_value):
+                continue
+
+            if len(child[2]) == n:
+                point = _get_point(child[2], positions)
+                if system.check(point):
+                    best_values, best_func_value = child[2], child[0]
+            else:
+                children.append(child)
+
+        if order == "best":
+            for child in children:
+                heapq.heappush(opened, child)
+        else:
+            # the child with the least bound is expanded first
+            opened.extend(sorted(children, reverse=True))
+
+    optimal = not opened
+    if best_values is None:
+        return BranchAndBoundResult(None, None, None if optimal else min(opened)[0], None, nodes,
+                                    time.time() - started, optimal)
+
+    point = tuple(_get_point(best_values, positions))
+    best_func_value = sum(i * j for i, j in zip(goal_func, point))
+    lower_bound = best_func_value if optimal else min(min(opened)[0], best_func_value)
+    return BranchAndBoundResult(point, best_func_value, lower_bound, best_func_value - lower_bound, nodes,
+                                time.time() - started, optimal)
+
+
+def _get_node(coefs, A, b, func_value, lhs, values, remaining, counter):
+    """
+    Gets the search node with the lower bound of the goal function in its subtree.
+    Returns None if some constraint can not be satisfied by the permutations of the remaining elements.
+    """
+    k = len(values)
+    if remaining:
+        # the minimum of each constraint on the remaining elements: the greatest coefs take the least elements
+        rest = np.array(remaining, dtype=float)
+        lhs_bound = lhs + np.dot(-np.sort(-A[:, k:], axis=1), rest)
+        func_bound = func_value + np.dot(coefs[k:], PermutationSet(remaining).find_min_of_linear_function(coefs[k:]))
+    else:
+        lhs_bound, func_bound = lhs, func_value
+
+    if np.any(lhs_bound + b > _TOLERANCE):
+        return None
+
+    return func_bound, counter, values, remaining, func_value, lhs
+
+
+def _get_point(values, positions):
+    """
+    Gets the point from the values assigned in the positions order.
+    """
+    point = [None] * len(values)
+    for position, value in zip(positions, values):
+        point[position] = value
+    return point
@@ -0,0 +1,135 @@
+__author__ = "Alex Baranov"
+
+import numpy as np
+
+from constraint_system import ConstraintSystem
+
+# the tolerance of the incrementally updated constraints and goal function values
+_TOLERANCE = 1e-9
+
+NEIGHBORHOODS = ("swap", "insertion")
+
+
+def refine_point(point, goal_func, system, neighborhoods=NEIGHBORHOODS, max_moves=None):
+    """
+    Improves the set point by the local search. While the point does not satisfy the constraints the move
+    that reduces the total violation of the constraints the most is made. Then the moves that keep the point valid
+    and reduce the goal function value the most are made until there are no such moves.
+
+    The constraints values and the goal function value are updated incrementally after each move,
+    and the change of each move is calculated in O(m) operations from the cumulative sums of the coefs.
+
+    The moves change the order of the point elements, so the point stays in the set only if the set
+    lists the moves in its 'neighborhoods' attribute.
+
+    Parameters:
+     - point - the set point
+     - goal_func - the coefs of the linear goal function
+     - system - the constraints system or the ConstraintSystem
+     - neighborhoods - the moves to make: "swap" - exchange two elements, "insertion" - move the element
+       to the other position shifting the elements between (default - both)
+     - max_moves - the maximal number of the moves (default - None, until there are no improving moves)
+
+    Returns the refined point, its goal function value and whether it satisfies the constraints.
+    """
+    if not isinstance(system, ConstraintSystem):
+        system = ConstraintSystem(system, len(goal_func))
+
+    unknown = set(neighborhoods) - set(NEIGHBORHOODS)
+    if unknown:
+        raise ValueError("Unknown neighborhoods: {0}".format(", ".join(sorted(unknown))))
+
+    x = np.array(point)
+
+    # the constraints coefs with the goal function coefs as the last row
+    coefs = np.vstack((system.A, np.asarray(goal_func, dtype=float)))
+    m = len(system)
+
+    # the left parts of the constraints (a*x + b <= 0) and the goal function value
+    residuals = np.dot(system.A, x) + system.b
+    func_value = np.dot(coefs[-1], x)
+
+    moves_count = 0
+    while max_moves is None or moves_count < max_moves:
+        moves, changes = _get_moves(x, coefs, neighborhoods)
+        if not len(moves):
+            break
+
+        violations = np.maximum(residuals + changes[:, :m], 0).sum(axis=1)
+        func_values = func_value + changes[:, m]
+        violation = np.maximum(residuals, 0).sum()
+
+        if violation > _TOLERANCE:
+            improving = violations < violation - _TOLERANCE
+        else:
+            improving = (violations <= _TOLERANCE) & (func_values < func_value - _TOLERANCE)
+
+        candidates = np.flatnonzero(improving)
+        if not len(candidates):
+            break
+
+        best = candidates[np.lexsort((func_values[candidates], violations[candidates]))[0]]
+        x = _make_move(x, moves[best])
+        residuals += changes[best, :m]
+        func_value += changes[best, m]
+        moves_count += 1
+
+    point = x.tolist()
+    return point, sum(i * j for i, j in zip(goal_func, point)), bool(system.check(x))
+
+
+def get_neighbors(point, neighborhoods=NEIGHBORHOODS):
+    """
+    Gets the array of the points made from the point by one move of the neighborhoods (a row per move).
+    The moves of the equal elements that do not change the point are skipped.
+    """
+    x = np.array(point)
+    moves, _ = _get_moves(x, np.zeros((0, len(x))), neighborhoods)
+    neighbors = np.array([_make_move(x, move) for move in moves]).reshape(len(moves), len(x))
+    return neighbors[np.any(neighbors != x, axis=1)]
+
+
+def _get_moves(x, coefs, neighborhoods):
+    """
+    Gets the moves (kind, i, j) of the neighborhoods and the array of the changes of the coefs rows values (a row per move).
+    """
+    n = len(x)
+    moves, changes = [], []
+
+    if "swap" in neighborhoods:
+        i, j = np.triu_indices(n, 1)
+        swapped = x[j] != x[i]
+        i, j = i[swapped], j[swapped]
+
+        # x_i and x_j exchange their values
+        changes.append(((x[j] - x[i])[:, np.newaxis] * (coefs[:, i] - coefs[:, j]).T).reshape(len(i), len(coefs)))
+        moves.extend(("swap", a, b) for a, b in zip(i, j))
+
+    if "insertion" in neighborhoods and n > 2:
+        # the insertions to the neighbour positions are the swaps
+        i, j = np.nonzero(np.abs(np.subtract.outer(np.arange(n), np.arange(n))) > 1)
+
+        # the cumulative changes of the shifted elements: right[t] - right[i] is the change when the positions
+        # i..t-1 take the next elements, left[i] - left[t] - when the positions t+1..i take the previous ones
+        steps = np.diff(x).astype(float)
+        right = np.hstack((np.zeros((len(coefs), 1)), np.cumsum(coefs[:, :-1] * steps, axis=1)))
+        left = np.hstack((np.zeros((len(coefs), 1)), np.cumsum(-coefs[:, 1:] * steps, axis=1)))
+
+        forward = i < j
+        shifts = np.where(forward, right[:, j] - right[:, i], left[:, i] - left[:, j])
+        changes.append((shifts + coefs[:, j] * (x[i] - x[j])).T)
+        moves.extend(("insertion", a, b) for a, b in zip(i, j))
+
+    if not moves:
+        return moves, np.zeros((0, len(coefs)))
+    return moves, np.vstack(changes)
+
+
+def _make_move(x, move):
+    kind, i, j = move
+    if kind == "swap":
+        x = x.copy()
+        x[i], x[j] = x[j], x[i]
+        return x
+
+    return np.insert(np.delete(x, i), j, x[i])
@@ -0,0 +1,89 @@
+__author__ = "Alex Baranov"
+
+import math
+from collections import Counter
+from combinatorial_set import CombinatorialSet
+from permutations import PermutationSet
+from localsearch import NEIGHBORHOODS
+
+
+class MultisetPermutationSet(CombinatorialSet):
+    """
+    Describes the set of permutations of the multiset: each permutation of the repeated elements is given once.
+    The set has n! / (m_1! * ... * m_r!) elements, where m_i are the multiplicities of the elements.
+    The linear functions and the nearest points are found the same way as for the PermutationSet.
+    """
+    neighborhoods = NEIGHBORHOODS
+
+    def __init__(self, s=()):
+        super(MultisetPermutationSet, self).__init__(s)
+        self._permutations = PermutationSet(s)
+
+    def __iter__(self):
+        """
+        Iterates the permutations in the lexicographic order.
+        """
+        point = list(self.generation_elements)
+        n = len(point)
+        while True:
+            yield tuple(point)
+
+            # the next permutation in the lexicographic order
+            i = n - 2
+            while i >= 0 and point[i] >= point[i + 1]:
+                i -= 1
+            if i < 0:
+                return
+            j = n - 1
+            while point[j] <= point[i]:
+                j -= 1
+            point[i], point[j] = point[j], point[i]
+            point[i + 1:] = reversed(point[i + 1:])
+
+    def get_size(self):
+        """
+        Gets the number of the permutations n! / (m_1! * ... * m_r!).
+        """
+        size = math.factorial(len(self.generation_elements))
+        for multiplicity in Counter(self.generation_elements).values():
+            size //= math.factorial(multiplicity)
+        return size
+
+    def find_min_of_linear_function(self, coefs):
+        """
+        Gets the minimum of the linear function on the given set.
+
+        Parameters:
+         - coefs - the coefficients (c_i) of the linear function of type F(x) = sum(c_i*x_i)
+        """
+        return self._permutations.find_min_of_linear_function(coefs)
+
+    def find_nearest_set_point(self, p):
+        """
+        Gets the nearest set point related to the given point 'p'
+
+        Parameters:
+         - p - some point in the space
+        """
+        return self._permutations.find_nearest_set_point(p)
+
+    def find_min_of_linear_functions(self, coefs):
+        """
+        Gets the minimums of the linear functions (rows of the (k x n) array) on the given set at once.
+        """
+        return self._permutations.find_min_of_linear_functions(coefs)
+
+    def find_nearest_set_points(self, points):
+        """
+        Gets the nearest set points related to the given points (rows of the (k x n) array) at once.
+        """
+        return self._permutations.find_nearest_set_points(points)
+
+    def sample(self, k, rng=None):
+        """
+        Gets the uniformly distributed random permutations (see PermutationSet.sample).
+        Each permutation of the multiset is given by the same number of the permutations of the positions.
+
+        Returns the (k x n) array of the permutations.
+        """
+        return self._permutations.sample(k, rng)
@@ -1,13 +1,18 @@
 __author__ = "Alex Baranov"
 
+import math
 import itertools as it
+import numpy as np
 from combinatorial_set import CombinatorialSet
+from localsearch import NEIGHBORHOODS
 
 
 class PermutationSet(CombinatorialSet):
     """
     Describes the set of permutations
     """
+    neighborhoods = NEIGHBORHOODS
+
     def __init__(self, s=()):
         super(PermutationSet, self).__init__(s)
 
@@ -15,6 +20,135 @@ class PermutationSet(CombinatorialSet):
         for x in it.permutations(self.generation_elements):
             yield x
 
+    def get_size(self):
+        """
+        Gets the number of the permutations n! (the permutations of the equal elements are counted).
+        """
+        return math.factorial(len(self.generation_elements))
+
+    def rank(self, points):
+        """
+        Gets the Lehmer code rank of the permutation: its index in the order of the set iterator.
+        The permutation with the equal elements gets the least of its ranks.
+
+        Parameters:
+         - points - the permutation or the (k x n) array of the permutations
+
+        Returns the rank or the array of the ranks.
+        """
+        points = np.asarray(points)
+        indexes = self._to_indexes(points.reshape(len(points) if points.ndim > 1 else 1, len(self.generation_elements)))
+        n = indexes.shape[1]
+
+        # the Lehmer code digit is the number of the following indexes that are less than the index
+        digits = np.triu(indexes[:, :, np.newaxis] > indexes[:, np.newaxis, :], 1).sum(axis=2)
+        ranks = np.dot(digits.astype(object if n > 20 else np.int64), self._get_weights())
+        return ranks if points.ndim > 1 else int(ranks[0])
+
+    def unrank(self, ranks):
+        """
+        Gets the permutation by its Lehmer code rank (see rank).
+
+        Parameters:
+         - ranks - the rank or the array of the ranks
+
+        Returns the permutation as the tuple or the (k x n) array of the permutations.
+        """
+        ranks = np.asarray(ranks, dtype=object if len(self.generation_elements) > 20 else np.int64)
+        indexes = self._from_ranks(ranks.reshape(-1))
+        points = np.array(self.generation_elements)[indexes]
+        return points if ranks.ndim else tuple(points[0].tolist())
+
+    def sample(self, k, rng=None):
+        """
+        Gets the uniformly distributed random permutations.
+
+        Parameters:
+         - k - the number of the permutations
+         - rng - the random numbers generator, e.g. np.random.RandomState(seed)
+           (default - None, the global numpy generator is used)
+
+        Returns the (k x n) array of the permutations.
+        """
+        rng = rng if rng is not None else np.random
+        random = getattr(rng, "random_sample", None) or rng.random
+
+        # the order of the random keys is the uniform random permutation of the indexes
+        indexes = np.argsort(random((k, len(self.generation_elements))), axis=1)
+        return np.array(self.generation_elements)[indexes].reshape(k, len(self.generation_elements))
+
+    def iter_range(self, start, stop=None):
+        """
+        Iterates the permutations with the ranks start, ..., stop - 1 in the order of the set iterator.
+
+        Parameters:
+         - start - the rank of the first permutation
+         - stop - the rank after the last permutation (default - None, till the end of the set)
+        """
+        stop = self.get_size() if stop is None else min(stop, self.get_size())
+        if start >= stop:
+            return
+
+        indexes = self._from_ranks(np.array([start], dtype=object))[0].tolist()
+        n = len(indexes)
+
+        # the number of the permutations left is counted by the Python long, it may not fit in the C long
+        remaining = stop - start
+        while remaining:
+            yield tuple(self.generation_elements[i] for i in indexes)
+            remaining -= 1
+
+            # the next permutation of the indexes in the lexicographic order
+            i = n - 2
+            while i >= 0 and indexes[i] > indexes[i + 1]:
+                i -= 1
+            if i < 0:
+                return
+            j = n - 1
+            while indexes[j] < indexes[i]:
+                j -= 1
+            indexes[i], indexes[j] = indexes[j], indexes[i]
+            indexes[i + 1:] = reversed(indexes[i + 1:])
+
+    def _get_weights(self):
+        """
+        Gets the factorials (n-1)!, ..., 1!, 0! of the Lehmer code digits.
+        """
+        n = len(self.generation_elements)
+        return np.array([math.factorial(n - 1 - i) for i in xrange(n)], dtype=object if n > 20 else np.int64)
+
+    def _to_indexes(self, points):
+        """
+        Gets the permutations of the generation elements indexes of the permutations (rows of the array).
+        The equal elements get their indexes in the order of the positions.
+        """
+        rows = np.arange(len(points))[:, np.newaxis]
+        order = np.argsort(points, axis=1, kind="mergesort")
+        if not np.array_equal(points[rows, order], np.broadcast_to(self.generation_elements, points.shape)):
+            raise ValueError("The points are not the permutations of the set elements")
+
+        indexes = np.empty(order.shape, dtype=int)
+        indexes[rows, order] = np.arange(order.shape[1])
+        return indexes
+
+    def _from_ranks(self, ranks):
+        """
+        Gets the permutations of the generation elements indexes by their ranks.
+        """
+        n = len(self.generation_elements)
+        if np.any((ranks < 0) | (ranks >= self.get_size())):
+            raise ValueError("The ranks should be in the range [0, {0})".format(self.get_size()))
+
+        available = np.tile(np.arange(n), (len(ranks), 1))
+        indexes = np.empty((len(ranks), n), dtype=int)
+        for i, weight in enumerate(self._get_weights()):
+            # the Lehmer code digit is the position of the index among the not used ones
+            digits = (ranks // weight % (n - i)).astype(int)
+            indexes[:, i] = available[np.arange(len(ranks)), digits]
+            available = available[np.arange(n - i) != digits[:, np.newaxis]].reshape(len(ranks), n - i - 1)
+
+        return indexes
+
     def find_min_of_linear_function(self, coefs):
         """
         Gets the minimum of the linear function on the given set.
@@ -48,6 +182,91 @@ class PermutationSet(CombinatorialSet):
         c = [-2 * x for x in p]
         return self.find_min_of_linear_function(c)
 
+    def find_min_of_linear_functions(self, coefs):
+        """
+        Gets the minimums of the linear functions on the given set at once.
+
+        Parameters:
+         - coefs - the (k x n) array, each row is the coefficients of the linear function
+
+        Returns the (k x n) array of the permutations.
+        """
+        coefs = np.asarray(coefs)
+
+        # the stable sort keeps the order of the equal coefs as find_min_of_linear_function does
+        return self._arrange_elements(np.argsort(-coefs, axis=1, kind="mergesort"))
+
+    def find_nearest_set_points(self, points):
+        """
+        Gets the nearest set points related to the given points at once
+
+        Parameters:
+         - points - the (k x n) array of the points in the space
+
+        Returns the (k x n) array of the permutations.
+        """
+        # the greatest coefs -2 * p_i are the least coordinates
+        return self._arrange_elements(np.argsort(points, axis=1, kind="mergesort"))
+
+    def _arrange_elements(self, keys):
+        """
+        Puts the i-th generation element to the position keys[:, i] of each row.
+        """
+        result = np.empty(keys.shape, dtype=np.array(self.generation_elements).dtype)
+        result[np.arange(len(keys))[:, np.newaxis], keys] = self.generation_elements
+        return result
+
+    def get_prefixes(self, count):
+        """
+        Gets the shortest prefixes that split the permutations into at least 'count' parts.
+        The prefix is the tuple of the indexes of the first generation elements of the permutations,
+        the prefixes are sorted in the order of the set iterator.
+        """
+        n = len(self.generation_elements)
+        length = 0
+        while length < n and math.factorial(n) // math.factorial(n - length) < count:
+            length += 1
+
+        return list(it.permutations(xrange(n), length))
+
+    def iterate_blocks(self, block_size, prefix=None):
+        """
+        Iterates the permutations by the (k x n) arrays (k <= block_size) in the same order as the set iterator does.
+        The permutations of the last elements are built once by the indexes, so each block is made by NumPy indexing.
+
+        Parameters:
+         - block_size - the maximal number of the permutations in the block
+         - prefix - the prefix returned by get_prefixes (default - None, all the permutations)
+        """
+        n = len(self.generation_elements)
+        elements = np.array(self.generation_elements)
+        prefix = tuple(prefix or ())
+        remaining = [i for i in xrange(n) if i not in prefix]
+
+        # the longest tail which permutations fit in the block
+        tail_length = len(remaining)
+        while tail_length > 0 and math.factorial(tail_length) > block_size:
+            tail_length -= 1
+        tails = list(it.permutations(xrange(tail_length)))
+        tails = np.array(tails, dtype=int).reshape(len(tails), tail_length)
+        heads_per_block = max(block_size // len(tails), 1)
+
+        heads = it.permutations(remaining, len(remaining) - tail_length)
+        while True:
+            block_heads = list(it.islice(heads, heads_per_block))
+            if not block_heads:
+                return
+
+            block = np.empty((len(block_heads), len(tails), n), dtype=int)
+            for i, head in enumerate(block_heads):
+                start = prefix + head
+                rest = np.array([j for j in remaining if j not in head], dtype=int)
+                block[i, :, :len(start)] = start
+                block[i, :, len(start):] = rest[tails]
+
+            # the shape is given explicitly for the empty permutation of the empty set
+            yield elements[block.reshape(len(block_heads) * len(tails), n)]
+
 if __name__ == '__main__':
     p = PermutationSet((1, 2, 3, 4))
     print p.generation_elements
@@ -2,7 +2,21 @@ __author__ = "Alex Baranov"
 
 from inequalities import chernikov as c
 from permutations import *
+from constraint_system import ConstraintSystem
+from localsearch import refine_point
+from evaluation_cache import EvaluationCache
+import time
+import itertools
+import multiprocessing
 import numpy as np
+from collections import namedtuple, OrderedDict
+
+# the best goal function value shared by the search processes
+_shared_best = None
+
+# the new best point found by the anytime search: the point, the goal function value, the time it was found at,
+# the seconds since the search start, the number of the experiments made and the series number
+Incumbent = namedtuple("Incumbent", ["point", "func_value", "timestamp", "elapsed", "evaluations", "series"])
 
 
 def find_minimum(goal_func,
@@ -11,20 +25,139 @@ def find_minimum(goal_func,
                  add_constraints=True,
                  series_count=3,
                  experiments_per_series=5,
-                 quiet=True):
+                 quiet=True,
+                 batch=False,
+                 rng=None,
+                 refine=False,
+                 cache=None,
+                 neighbors_on_stall=False):
     """
     Gets the minimum of the linear function with linear constraints
     on the combinatorial set
 
+    Arguments:
+        constraints_system -- the list of the constraints rows or the ConstraintSystem
+        batch -- run all the experiments of the series as the array operations. Gives the same results
+            as the experiments run one by one with the same random numbers generator (default - False)
+        rng -- the random numbers generator, e.g. np.random.RandomState(seed)
+            (default - None, the global numpy generator is used)
+        refine -- improve the nearest set points by the local search before they are checked, so the invalid
+            points are repaired and the valid ones are improved (see localsearch.refine_point). The set should
+            list the local search moves that keep its points in the 'neighborhoods' attribute (default - False)
+        cache -- the EvaluationCache of the set points, pass it to get the hits statistics. The cache can be used
+            for one goal function and constraints system only (default - None, the new cache is used)
+        neighbors_on_stall -- check the neighbours of the best point in the series that gave no new set points.
+            The neighbours are given by the set (see CombinatorialSet.get_neighbors) (default - False)
+
     Returns:
         - (point and function value)
     """
+    if refine and not combinatorial_set.neighborhoods:
+        raise ValueError("The local search moves do not keep the points of the {0}".format(
+            type(combinatorial_set).__name__))
+
+    return _find_minimum(goal_func, constraints_system, combinatorial_set, add_constraints, series_count,
+                         experiments_per_series, quiet, batch, rng, refine=refine, cache=cache,
+                         neighbors_on_stall=neighbors_on_stall)
 
-    # define function to calculate goal function value
-    f = lambda x: sum(i * j for i, j in zip(goal_func, x))
+
+def _find_minimum(goal_func, constraints_system, combinatorial_set, add_constraints, series_count,
+                  experiments_per_series, quiet, batch, rng, shared_best=None, stats=None, refine=False, cache=None,
+                  neighbors_on_stall=False):
+    """
+    Runs the given number of the random search series. See find_minimum and _search_series for details.
+    """
+    best = None, None
+    for best in itertools.islice(_search_series(goal_func, constraints_system, combinatorial_set, add_constraints,
+                                                experiments_per_series, quiet, batch, rng, shared_best, stats,
+                                                refine, cache, neighbors_on_stall),
+                                 series_count):
+        pass
+
+    return best
+
+
+def iterate_minimum(goal_func,
+                    constraints_system,
+                    combinatorial_set,
+                    time_budget=None,
+                    max_evaluations=None,
+                    stall_series=None,
+                    cancel=None,
+                    add_constraints=True,
+                    experiments_per_series=5,
+                    batch=True,
+                    rng=None):
+    """
+    Searches the minimum of the linear function with linear constraints on the combinatorial set
+    until one of the stop conditions is met. Yields the Incumbent each time the better point is found,
+    so the caller always has the best point found so far. The conditions are checked after each series.
+    The search runs until the caller stops the iteration if there are no stop conditions.
+
+    Arguments:
+        time_budget -- the maximal search time in seconds (default - None)
+        max_evaluations -- the maximal number of the experiments (default - None)
+        stall_series -- stop if the best point is not improved during the given number of the series (default - None)
+        cancel -- the object with is_set() method, e.g. threading.Event, that stops the search when it is set
+            (default - None)
+        batch -- run the experiments of the series as the array operations (default - True)
+        See find_minimum for the other arguments.
+    """
+    started = time.time()
+    if max_evaluations is not None and max_evaluations <= 0:
+        return
+
+    series_size = lambda done: experiments_per_series if max_evaluations is None \
+        else min(experiments_per_series, max_evaluations - done)
+
+    evaluations, last_improvement, best_func_value = 0, 0, None
+    experiments_count = series_size(evaluations)
+    series = _search_series(goal_func, constraints_system, combinatorial_set, add_constraints, experiments_count,
+                            True, batch, rng)
+    point, func_value = next(series)
+
+    for series_number in itertools.count():
+        evaluations += experiments_count
+        if func_value is not None and (best_func_value is None or func_value < best_func_value):
+            best_func_value = func_value
+            last_improvement = series_number
+            now = time.time()
+            yield Incumbent(point, func_value, now, now - started, evaluations, series_number)
+
+        if (time_budget is not None and time.time() - started >= time_budget) or \
+                (max_evaluations is not None and evaluations >= max_evaluations) or \
+                (stall_series is not None and series_number - last_improvement >= stall_series) or \
+                (cancel is not None and cancel.is_set()):
+            return
+
+        experiments_count = series_size(evaluations)
+        point, func_value = series.send(experiments_count)
+
+
+def _search_series(goal_func, constraints_system, combinatorial_set, add_constraints, experiments_per_series,
+                   quiet, batch, rng, shared_best=None, stats=None, refine=False, cache=None,
+                   neighbors_on_stall=False):
+    """
+    Runs the series of the random search experiments endlessly. After each series yields the best point
+    and the goal function value found so far. The number of the experiments of the next series can be sent
+    to the generator. See find_minimum for details.
+
+    Arguments:
+        shared_best -- the multiprocessing.Value with the best goal function value of all the search processes.
+            After each series the chain publishes its best value and cuts the search area by the best one
+            (default - None, the value is not shared)
+        stats -- the dict that collects the search statistics (default - None)
+        refine -- refine the nearest set points by the local search (default - False)
+        cache -- the EvaluationCache of the set points (default - None, the new cache is used)
+        neighbors_on_stall -- check the neighbours of the best point if the series gives no new points
+            (default - False)
+    """
+
+    if cache is None:
+        cache = EvaluationCache()
 
     # copying the constraints system to modify it then
-    copied_system = list(constraints_system)
+    copied_system = ConstraintSystem(constraints_system)
 
     if add_constraints:
         if not quiet:
@@ -41,42 +174,66 @@ def find_minimum(goal_func,
     const_was_inserted = False
 
     # starting series of experiments
-    for series_number in xrange(series_count):
+    for series_number in itertools.count():
         if not quiet:
             print "---> Starting series #", series_number
 
-        # store the valid points in the dict
-        experiment_valid_points = dict()
-        for experiment_number in xrange(experiments_per_series):
-            if not quiet:
-                print "Starting experiment #", experiment_number
+        if batch:
+            points = _run_experiments_batch(solver, copied_system, combinatorial_set, goal_func,
+                                            experiments_per_series, rng, refine)
+        else:
+            points = []
+            for experiment_number in xrange(experiments_per_series):
+                if not quiet:
+                    print "Starting experiment #", experiment_number
 
-            # getting some solution of the system
-            s = solver.get_solution(copied_system)
-            if not quiet:
-                print "Generated new point within the search area: ", s
+                # getting some solution of the system
+                s = solver.get_solution(copied_system, rng=rng)
+                if not quiet:
+                    print "Generated new point within the search area: ", s
+
+                # get the nearest point of the set
+                nearest_set_point = combinatorial_set.find_nearest_set_point(s)
+                if not quiet:
+                    print "The nearest combinatorial set point is: ", nearest_set_point
+
+                if refine:
+                    nearest_set_point, _, _ = refine_point(nearest_set_point, goal_func, copied_system,
+                                                           combinatorial_set.neighborhoods)
+                    if not quiet:
+                        print "The refined set point is: ", nearest_set_point
 
-            # get the nearest point of the set
-            nearest_set_point = combinatorial_set.find_nearest_set_point(s)
+                points.append(nearest_set_point)
+
+        # check whether the set points are valid. The repeated points are taken from the cache
+        valid, func_values, new_points = _evaluate_points(points, copied_system, goal_func, cache)
+        if not quiet:
+            print "Found {0} valid points, {1} points were not evaluated before".format(sum(valid), new_points)
+
+        if neighbors_on_stall and len(points) and not new_points:
+            # the projections give the known points only, so the neighbours of the best point are checked instead
+            neighbors = combinatorial_set.get_neighbors(best_point if best_point is not None else points[-1])
+            neighbors_valid, neighbors_values, new_points = _evaluate_points(neighbors, copied_system, goal_func,
+                                                                             cache)
+            points, valid, func_values = list(points) + list(neighbors), valid + neighbors_valid, \
+                func_values + neighbors_values
             if not quiet:
-                print "The nearest combinatorial set point is: ", nearest_set_point
+                print "Checked {0} neighbours of the point, {1} of them are valid".format(len(neighbors),
+                                                                                        sum(neighbors_valid))
 
-            # check whether the set point is valid
-            if is_solution(copied_system, nearest_set_point):
-                func_value = f(nearest_set_point)
-                experiment_valid_points[func_value] = nearest_set_point
-                if not quiet:
-                    print "Found point is valid. Goal function value in this point is: ", func_value
-            else:
-                if not quiet:
-                    print "The nearest set point is not valid"
+        # store the valid points with their function values in the order they were found.
+        # the rows of the batch arrays are converted, so the points have the Python numbers in any mode
+        experiment_valid_points = OrderedDict()
+        for point, point_valid, func_value in zip(points, valid, func_values):
+            if point_valid:
+                experiment_valid_points.setdefault(tuple(np.asarray(point).tolist()), func_value)
 
         # save this point
         if len(experiment_valid_points):
-            current_min = min(experiment_valid_points)
+            # the first point of the minimal value is taken
+            current_point, current_min = min(experiment_valid_points.items(), key=lambda item: item[1])
             if best_func_value is None or current_min < best_func_value:
-                best_func_value = min(experiment_valid_points)
-                best_point = experiment_valid_points[best_func_value]
+                best_point, best_func_value = list(current_point), current_min
 
             if not quiet:
                 print "Current best point {0} with function value = {1}".format(best_point, best_func_value)
@@ -90,7 +247,182 @@ def find_minimum(goal_func,
             else:
                 copied_system.insert(last_system_index, goal_func + (-1 * best_func_value,))
 
-    return best_point, best_func_value
+        if shared_best is not None:
+            # the other chains may have found the better value
+            global_best = _share_best_value(shared_best, best_func_value)
+            if global_best is not None and (best_func_value is None or global_best < best_func_value):
+                copied_system.append(goal_func + (-1 * global_best,))
+                if stats is not None:
+                    stats["shared_cuts"] += 1
+
+        if stats is not None:
+            stats["series"] += 1
+            stats["experiments"] += experiments_per_series
+            stats["valid_values"] += len(experiment_valid_points)
+            stats["new_points"] += new_points
+
+        experiments_count = yield best_point, best_func_value
+        if experiments_count:
+            experiments_per_series = experiments_count
+
+
+def find_minimum_parallel(goal_func,
+                          constraints_system,
+                          combinatorial_set,
+                          workers=None,
+                          seed=None,
+                          add_constraints=True,
+                          series_count=3,
+                          experiments_per_series=5,
+                          batch=True,
+                          share_best=True):
+    """
+    Gets the minimum of the linear function with linear constraints on the combinatorial set
+    running the independent random search chains in the processes pool.
+    Each chain has its own random numbers generator derived from the seed and the chain index.
+    After each series the chains share the best found goal function value, so each chain cuts its
+    search area by the best value of all the chains.
+
+    Arguments:
+        workers -- the number of the chains and the processes (default - None, the number of CPUs)
+        seed -- the seed of the chains generators (default - None, the random seed)
+        batch -- run the experiments of the series as the array operations (default - True)
+        share_best -- share the best goal function value between the chains. The results of the same seed
+            are reproducible only if the value is not shared (default - True)
+        See find_minimum for the other arguments.
+
+    Returns:
+        - (point, function value, the list of the chains statistics)
+    """
+    workers = workers or multiprocessing.cpu_count()
+    if seed is None:
+        seed = np.random.randint(2 ** 31)
+
+    shared_best = multiprocessing.Value("d", float("inf")) if share_best else None
+    tasks = [(goal_func, constraints_system, combinatorial_set, add_constraints, series_count,
+              experiments_per_series, batch, seed, index) for index in xrange(workers)]
+
+    pool = multiprocessing.Pool(workers, _init_search_worker, (shared_best,))
+    try:
+        results = pool.map(_run_search_chain, tasks)
+    finally:
+        pool.close()
+        pool.join()
+
+    best_point, best_func_value = None, None
+    for point, func_value, _ in results:
+        if func_value is not None and (best_func_value is None or func_value < best_func_value):
+            best_point, best_func_value = point, func_value
+
+    return best_point, best_func_value, [chain_stats for _, _, chain_stats in results]
+
+
+def _get_chain_rng(seed, index):
+    """
+    Gets the random numbers generator of the search chain: the spawned child of the seed sequence
+    for the numpy versions that support it or the RandomState seeded by the (seed, index) pair.
+    """
+    if hasattr(np.random, "SeedSequence"):
+        return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    return np.random.RandomState([seed, index])
+
+
+def _init_search_worker(shared_best):
+    global _shared_best
+    _shared_best = shared_best
+
+
+def _run_search_chain(task):
+    goal_func, constraints_system, combinatorial_set, add_constraints, series_count, \
+        experiments_per_series, batch, seed, index = task
+
+    stats = dict(chain=index, seed=seed, series=0, experiments=0, valid_values=0, new_points=0, shared_cuts=0)
+    started = time.time()
+    point, func_value = _find_minimum(goal_func, constraints_system, combinatorial_set, add_constraints,
+                                      series_count, experiments_per_series, True, batch,
+                                      _get_chain_rng(seed, index), _shared_best, stats)
+
+    stats.update(best_point=point, best_func_value=func_value, elapsed=time.time() - started)
+    return point, func_value, stats
+
+
+def _share_best_value(shared_best, func_value):
+    """
+    Publishes the goal function value if it is better than the shared one.
+    Returns the best value of all the chains or None if there is no value yet.
+    """
+    with shared_best.get_lock():
+        if func_value is not None and func_value < shared_best.value:
+            shared_best.value = func_value
+        best = shared_best.value
+
+    return None if best == float("inf") else best
+
+
+def _run_experiments_batch(solver, system, combinatorial_set, goal_func, experiments_count, rng=None, refine=False):
+    """
+    Runs the experiments of the series at once: generates the solutions of the system,
+    gets their nearest set points and refines them if required.
+
+    Returns the array of the set points (a row per experiment).
+    """
+    solutions = solver.get_solutions(system, experiments_count, rng=rng)
+    points = combinatorial_set.find_nearest_set_points(solutions)
+    if refine:
+        points = np.array([refine_point(point, goal_func, system, combinatorial_set.neighborhoods)[0]
+                           for point in points])
+    return points
+
+
+def _evaluate_points(points, system, goal_func, cache):
+    """
+    Checks the set points and calculates their goal function values. The points found in the cache are checked
+    only with the constraints appended after they were evaluated, the other points are evaluated at once.
+
+    Returns the list of the validity flags, the list of the goal function values and the number of the points
+    that were not found in the cache.
+    """
+    valid, func_values = [False] * len(points), [None] * len(points)
+    # the indexes of the new points in the list keyed by the point
+    evaluated = OrderedDict()
+    for index, point in enumerate(points):
+        key = tuple(np.asarray(point).tolist())
+        if key in evaluated:
+            evaluated[key].append(index)
+            cache.hits += 1
+            continue
+
+        entry = cache.get(key)
+        if entry is None:
+            evaluated[key] = [index]
+            continue
+
+        func_value, point_valid, constraints_count = entry
+        if point_valid and constraints_count < len(system):
+            point_valid = bool(np.all(np.dot(system.A[constraints_count:], key) <= -system.b[constraints_count:]))
+            cache.put(key, func_value, point_valid, len(system))
+        valid[index], func_values[index] = point_valid, func_value
+
+    if evaluated:
+        new_points = np.array(evaluated.keys())
+        new_valid = system.check(new_points).tolist()
+        new_values = _get_func_values(goal_func, new_points).tolist()
+        for key, point_valid, func_value in zip(evaluated, new_valid, new_values):
+            cache.put(key, func_value, point_valid, len(system))
+            for index in evaluated[key]:
+                valid[index], func_values[index] = point_valid, func_value
+
+    return valid, func_values, len(evaluated)
+
+
+def _get_func_values(goal_func, points):
+    """
+    Calculates the values of the linear goal function in the points (rows of the array).
+    """
+    values = np.zeros(len(points), dtype=np.result_type(points, np.array(goal_func)))
+    for index, coef in enumerate(goal_func):
+        values += coef * points[:, index]
+    return values
 
 
 def add_additional_constraints(system, coefs, add_less_then_zero=False, add_simplex=True):
@@ -101,7 +433,7 @@ def add_additional_constraints(system, coefs, add_less_then_zero=False, add_simp
     combinatorial set with the simplex.
 
     Arguments:
-        system -- the matrix that represents the constraint system
+        system -- the matrix that represents the constraint system or the ConstraintSystem
         coefs -- the array of coefficients that will be used to add new constraints
         add_less_then_zero -- specifies whether the constraints of type: -x_i <= 0 should be added (default - True)
         add_simplex -- specifies whether the simplex constraints should be added (default - True)
@@ -132,41 +464,93 @@ def add_additional_constraints(system, coefs, add_less_then_zero=False, add_simp
         constraints_system = np.vstack((constraints_system, type1))
         constraints_system = np.vstack((constraints_system, type2))
 
+    if isinstance(system, ConstraintSystem):
+        return ConstraintSystem(constraints_system)
     return constraints_system.tolist()
 
 
 def find_minimum_with_exhaustive_search(goal_func,
                                         system,
-                                        combinatorial_set):
+                                        combinatorial_set,
+                                        block_size=65536,
+                                        workers=1):
     """
-    Gets the solution by iterating all the elements in the set
+    Gets the solution by iterating all the elements in the set.
+    The elements are enumerated by the blocks, the constraints and the goal function are checked for the whole block
+    and only the best element is kept. If there are several minimal elements the first one is returned.
+
+    Parameters:
+     - goal_func - the coefs of the linear goal function
+     - system - the constraints system
+     - combinatorial_set - the combinatorial set
+     - block_size - the maximal number of the elements checked at once (default - 65536)
+     - workers - the number of the processes sharing the enumeration by the prefixes of the elements (default - 1,
+       the search runs in the current process; None - the number of the CPUs)
 
     Retruns pair of combinatorial element and minimal function value
     """
+    if not isinstance(system, ConstraintSystem):
+        system = ConstraintSystem(system)
+
+    workers = workers or multiprocessing.cpu_count()
+    if workers == 1:
+        results = [_search_blocks(goal_func, system, combinatorial_set, block_size)]
+    else:
+        # more parts than workers, so the pool balances the unequal parts
+        tasks = [(goal_func, system.tolist(), combinatorial_set, block_size, prefix)
+                 for prefix in combinatorial_set.get_prefixes(4 * workers)]
+        pool = multiprocessing.Pool(workers)
+        try:
+            results = pool.map(_run_search_blocks, tasks)
+        finally:
+            pool.close()
+            pool.join()
+
+    # the parts are ordered as the set elements, so the first minimal element is kept
+    best_point, best_func_value = None, None
+    for point, func_value in results:
+        if point is not None and (best_point is None or func_value < best_func_value):
+            best_point, best_func_value = point, func_value
+
+    if best_point is None:
+        raise ValueError("There are no set elements satisfying the constraints")
 
-    #calcualte goal functions for all the elements
-    valid_values = map(lambda e: (e, sum(i * j for i, j in zip(goal_func, e))) if is_solution(system, e) else None, combinatorial_set)
+    return best_point, best_func_value
+
+
+def _run_search_blocks(args):
+    goal_func, system, combinatorial_set, block_size, prefix = args
+    return _search_blocks(goal_func, ConstraintSystem(system, len(goal_func)), combinatorial_set, block_size, prefix)
 
-    # remove all the None
-    valid_values = filter(lambda x: x != None, valid_values)
 
-    # get minimal value
-    return min(valid_values, key=lambda x: x[1])
+def _search_blocks(goal_func, system, combinatorial_set, block_size, prefix=None):
+    """
+    Gets the first element with the minimal goal function value among the elements with the given prefix
+    that satisfy the constraints. Returns the pair (None, None) if there are no such elements.
+    """
+    best_point, best_func_value = None, None
+    for block in combinatorial_set.iterate_blocks(block_size, prefix):
+        block = block[system.check(block)]
+        if not len(block):
+            continue
+
+        func_values = _get_func_values(goal_func, block)
+        index = np.argmin(func_values)
+        if best_point is None or func_values[index] < best_func_value:
+            best_point, best_func_value = tuple(block[index].tolist()), func_values[index].item()
+
+    return best_point, best_func_value
 
 
 def is_solution(system, point):
     """
     Checks whether the point is the solution for a given constraints system.
+    Pass the ConstraintSystem to check many points against the same system.
     """
-    a = np.array(system)
-
-    # get the left part
-    left = a[:, :-1] * point
-    left = sum(left.T)
+    if not isinstance(system, ConstraintSystem):
+        system = ConstraintSystem(system)
 
-    # get the right part
-    right = (-1) * a[:, -1]
-    return np.all(left <= right)
+    return system.check(point)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,65 @@
+__author__ = 'Alex Baranov'
+
+import unittest
+import numpy as np
+
+from ..discrete.inequalities import benchmark as b
+from ..discrete import randomsearch as rs
+
+
+class TestBenchmark(unittest.TestCase):
+    """
+    Tests for the benchmark of the Chernikov method
+    """
+
+    def test_generators(self):
+        """
+        Verify the generated systems have the expected shapes and solutions
+        """
+        system = b.generate_random_system(5, 3, seed=1)
+        self.assertEqual(system.shape, (5, 4))
+        self.assertTrue(np.array_equal(system, b.generate_random_system(5, 3, seed=1)))
+
+        sparse_system = b.generate_sparse_system(20, 4, density=0.2)
+        self.assertEqual(sparse_system.shape, (20, 5))
+
+        # the simplex constraints are added as the random search adds them
+        system = b.generate_random_system(5, 3)
+        self.assertTrue(np.array_equal(b.generate_simplex_bounded_system(5, 3),
+                                       rs.add_additional_constraints(system, np.arange(1, 4))))
+        self.assertEqual(b.generate_simplex_bounded_system(5, 3).shape, (5 + 3 + 1, 4))
+
+        # the vertices of the permutation polytope are the permutations
+        case = b.BenchmarkCase("permutation-4", "inequalities", "permutation", dict(variables=4), {})
+        self.assertEqual(b.run_case(case, isolated=False)["result_rows"], 24)
+
+    def test_cases_scale(self):
+        """
+        Verify the cases include the wide systems and the variables counts are scaled
+        """
+        cases = dict((case.name, case) for case in b.get_cases())
+        self.assertEqual(cases["random-4x20"].params["variables"], 20)
+        self.assertEqual(cases["equations-4x20"].params["variables"], 20)
+
+        scaled = dict((case.name, case) for case in b.get_cases(scale=2, variables_scale=2))
+        self.assertEqual(scaled["random-8x40"].params, dict(rows=8, variables=40))
+        self.assertEqual(scaled["equations-2x16"].params, dict(rows=2, variables=16))
+        self.assertEqual(scaled["permutation-6"].params, dict(variables=6))
+        self.assertEqual(len(scaled), len(cases))
+
+    def test_run_and_compare(self):
+        """
+        Verify the benchmark results are compared by the case names
+        """
+        cases = [case for case in b.get_cases() if case.name in ("random-4x4", "equations-2x8")]
+        results = b.run_benchmark(cases, repeat=1)
+        self.assertEqual([result["name"] for result in results["results"]], ["random-4x4", "equations-2x8"])
+        for result in results["results"]:
+            self.assertTrue(result["time"] > 0)
+            self.assertTrue(result["max_rows"] >= result["result_rows"])
+
+        self.assertEqual(b.compare_results(results, results), [])
+
+        slower = dict(results, results=[dict(results["results"][0], time=results["results"][0]["time"] * 2)])
+        regressions = b.compare_results(results, slower)
+        self.assertEqual([(name, metric) for name, metric, _, _, _ in regressions], [("random-4x4", "time")])
@@ -0,0 +1,264 @@
+__author__ = 'Alex Baranov'
+
+import unittest
+import itertools
+import numpy as np
+
+from ..discrete.permutations import PermutationSet
+from ..discrete.cycle_permutations import CyclePermutationSet
+from ..discrete.arrangements import ArrangementSet
+from ..discrete.combinations import CombinationSet
+from ..discrete.multiset_permutations import MultisetPermutationSet
+from ..discrete.combinatorial_set import CombinatorialSet
+
+
+class TestPermutationSet(unittest.TestCase):
+    """
+    Tests for the set of permutations
+    """
+
+    def setUp(self):
+        self.pset = PermutationSet([1, 2, 2, 3, 4])
+
+    def test_batch_projection(self):
+        """
+        Verify the batch projection and minimization give the same points as the methods for one point
+        """
+        rng = np.random.RandomState(0)
+        points = np.vstack((rng.randn(20, 5), rng.randint(-2, 3, (20, 5))))
+
+        expected = [self.pset.find_nearest_set_point(p) for p in points]
+        self.assertEqual(self.pset.find_nearest_set_points(points).tolist(), expected)
+        self.assertEqual(CombinatorialSet.find_nearest_set_points(self.pset, points).tolist(), expected)
+
+        expected = [self.pset.find_min_of_linear_function(c) for c in points]
+        self.assertEqual(self.pset.find_min_of_linear_functions(points).tolist(), expected)
+        self.assertEqual(CombinatorialSet.find_min_of_linear_functions(self.pset, points).tolist(), expected)
+        self.assertEqual(self.pset.find_nearest_set_points(np.zeros((0, 5))).shape, (0, 5))
+
+    def test_rank_and_unrank(self):
+        """
+        Verify the ranks are the indexes of the permutations in the order of the set iterator
+        """
+        permutations = list(self.pset)
+        self.assertEqual(len(self.pset), len(permutations))
+        self.assertEqual([self.pset.unrank(r) for r in range(len(permutations))], permutations)
+        self.assertEqual(self.pset.unrank(np.arange(len(permutations))).tolist(), [list(p) for p in permutations])
+
+        # the permutation with the equal elements gets its first rank
+        ranks = self.pset.rank(np.array(permutations))
+        self.assertEqual([permutations[r] for r in ranks], permutations)
+        self.assertEqual(self.pset.rank((1, 2, 2, 3, 4)), 0)
+
+        pset = PermutationSet(range(6))
+        self.assertEqual(pset.rank(np.array(list(pset))).tolist(), range(720))
+
+        # the ranks of the long permutations are the Python integers
+        pset = PermutationSet(range(25))
+        self.assertEqual(pset.rank(pset.unrank(10 ** 24 + 1)), 10 ** 24 + 1)
+
+        self.assertRaises(ValueError, self.pset.rank, (1, 1, 2, 3, 4))
+        self.assertRaises(ValueError, self.pset.unrank, 120)
+
+    def test_empty_set(self):
+        """
+        Verify the set of the empty permutation is ranked and enumerated as the set iterator gives it
+        """
+        pset = PermutationSet(())
+        self.assertEqual(list(pset), [()])
+        self.assertEqual(len(pset), 1)
+        self.assertEqual(pset.rank(()), 0)
+        self.assertEqual(pset.rank(np.empty((2, 0))).tolist(), [0, 0])
+        self.assertEqual(pset.unrank(0), ())
+        self.assertEqual(list(pset.iter_range(0)), [()])
+        self.assertEqual(pset.get_prefixes(4), [()])
+
+        blocks = [block.shape for prefix in pset.get_prefixes(4) for block in pset.iterate_blocks(10, prefix)]
+        self.assertEqual(blocks, [(1, 0)])
+
+    def test_iter_range_and_sample(self):
+        """
+        Verify the enumeration starts at the given rank and the samples are uniform
+        """
+        permutations = list(self.pset)
+        for start in (0, 1, 37, 119, 120):
+            self.assertEqual(list(self.pset.iter_range(start, start + 10)), permutations[start:start + 10])
+        self.assertEqual(list(self.pset.iter_range(100)), permutations[100:])
+
+        # the ranges of the large sets do not fit in the C long
+        pset = PermutationSet(range(25))
+        self.assertTrue(pset)
+        self.assertFalse(CyclePermutationSet(()))
+        self.assertRaises(OverflowError, len, pset)
+        self.assertEqual(zip(pset, range(2)), [(tuple(range(25)), 0), (pset.unrank(1), 1)])
+        self.assertEqual(next(pset.iter_range(0)), tuple(range(25)))
+        for start in (0, 10 ** 20):
+            points = list(itertools.islice(pset.iter_range(start), 3))
+            self.assertEqual(points, [pset.unrank(start + i) for i in range(3)])
+        self.assertEqual(list(pset.iter_range(pset.get_size() - 2)), [pset.unrank(pset.get_size() - 2),
+                                                                     tuple(reversed(range(25)))])
+
+        pset = PermutationSet(range(4))
+        samples = pset.sample(2400, np.random.RandomState(0))
+        self.assertEqual(samples.shape, (2400, 4))
+        counts = np.bincount(pset.rank(samples), minlength=24)
+        self.assertTrue(counts.min() > 50 and counts.max() < 150)
+
+
+class TestCyclePermutationSet(unittest.TestCase):
+    """
+    Tests for the set of cyclic permutations
+    """
+
+    def setUp(self):
+        self.cset = CyclePermutationSet([10, 20, 30, 40, 50])
+
+    def is_cyclic(self, point):
+        # follow the map of the positions from the first one
+        elements = self.cset.generation_elements
+        position, length = 0, 0
+        while True:
+            position = elements.index(point[position])
+            length += 1
+            if not position:
+                return length == len(elements)
+
+    def test_enumeration(self):
+        """
+        Verify the set contains all the (n-1)! cyclic permutations of the elements
+        """
+        cycles = list(self.cset)
+        self.assertEqual(len(cycles), 24)
+        self.assertEqual(len(self.cset), 24)
+        self.assertEqual(len(set(cycles)), 24)
+        self.assertTrue(all(self.is_cyclic(p) for p in cycles))
+        self.assertEqual(sorted(CyclePermutationSet([1, 2, 3, 4])),
+                         [(2, 3, 4, 1), (2, 4, 1, 3), (3, 1, 4, 2), (3, 4, 2, 1), (4, 1, 2, 3), (4, 3, 1, 2)])
+        self.assertEqual(list(CyclePermutationSet([7])), [(7,)])
+
+    def test_rank_and_sample(self):
+        """
+        Verify the ranks are the indexes of the cyclic permutations in the order of the set iterator
+        """
+        cycles = list(self.cset)
+        self.assertEqual([self.cset.unrank(r) for r in range(24)], cycles)
+        self.assertEqual(self.cset.rank(np.array(cycles)).tolist(), range(24))
+        self.assertEqual(self.cset.rank(cycles[5]), 5)
+        self.assertEqual(list(self.cset.iter_range(20)), cycles[20:])
+        self.assertRaises(ValueError, self.cset.rank, (20, 10, 30, 40, 50))
+
+        blocks = [block for prefix in self.cset.get_prefixes(3) for block in self.cset.iterate_blocks(5, prefix)]
+        self.assertEqual(np.vstack(blocks).tolist(), [list(p) for p in cycles])
+
+        samples = self.cset.sample(100, np.random.RandomState(0))
+        self.assertEqual(samples.shape, (100, 5))
+        self.assertTrue(all(self.is_cyclic(p) for p in samples.tolist()))
+
+    def test_large_set_blocks(self):
+        """
+        Verify the blocks and the ranges of the set which ranks do not fit in the C long
+        """
+        cset = CyclePermutationSet(range(23))
+        block = next(cset.iterate_blocks(10, ()))
+        self.assertEqual(cset.rank(block).tolist(), range(10))
+
+        size = cset.get_size()
+        self.assertEqual(cset.get_prefixes(3)[-1][1], size)
+        blocks = list(cset.iterate_blocks(4, (size - 6, size)))
+        self.assertEqual([len(b) for b in blocks], [4, 2])
+        self.assertEqual(cset.rank(np.vstack(blocks)).tolist(), range(size - 6, size))
+
+        start = 10 ** 20
+        self.assertEqual(list(itertools.islice(cset.iter_range(start), 2)), [cset.unrank(start), cset.unrank(start + 1)])
+
+    def test_neighbors(self):
+        """
+        Verify the neighbours of the cyclic permutation are the different cyclic permutations
+        """
+        point = self.cset.unrank(7)
+        neighbors = [tuple(p) for p in self.cset.get_neighbors(point).tolist()]
+        self.assertEqual(len(neighbors), 10)
+        self.assertEqual(len(set(neighbors)), 10)
+        self.assertTrue(point not in neighbors)
+        self.assertTrue(all(self.is_cyclic(p) for p in neighbors))
+        self.assertEqual(CyclePermutationSet([1, 2]).get_neighbors((2, 1)).shape, (0, 2))
+
+
+class TestArrangementAndCombinationSets(unittest.TestCase):
+    """
+    Tests for the sets of arrangements, combinations and permutations of multisets
+    """
+
+    def assertMinimum(self, cset, coefs):
+        points = list(cset)
+        self.assertTrue(tuple(cset.find_min_of_linear_function(coefs)) in points)
+        self.assertAlmostEqual(np.dot(coefs, cset.find_min_of_linear_function(coefs)),
+                               min(np.dot(coefs, p) for p in points))
+
+    def test_neighbors(self):
+        """
+        Verify the neighbours are given by the local search moves of the set
+        """
+        for cset in (ArrangementSet(range(1, 6), 3), CombinationSet(range(1, 6), 2), PermutationSet([1, 2, 2, 3])):
+            points = set(cset)
+            point = next(iter(cset))
+            neighbors = cset.get_neighbors(point).tolist()
+            self.assertTrue(len(neighbors) > 0)
+            self.assertTrue(all(tuple(p) in points and tuple(p) != point for p in neighbors))
+
+        self.assertRaises(NotImplementedError, CombinatorialSet([1, 2]).get_neighbors, (1, 2))
+
+    def test_arrangements(self):
+        """
+        Verify the arrangements minimum of the linear function and the nearest point are found exactly
+        """
+        aset = ArrangementSet([4, -2, 7, 0, 3, 3], 3)
+        arrangements = list(aset)
+        self.assertEqual(len(aset), len(arrangements))
+        self.assertEqual(len(aset), 120)
+
+        rng = np.random.RandomState(0)
+        for coefs in [(1, 0, -1), (0, 0, 0), (-2, -1, -3)] + rng.randn(10, 3).tolist():
+            self.assertMinimum(aset, coefs)
+
+        points = rng.randn(20, 3) * 4
+        nearest = aset.find_nearest_set_points(points)
+        for point, found in zip(points, nearest):
+            self.assertTrue(tuple(found) in arrangements)
+            self.assertAlmostEqual(np.sum((found - point) ** 2),
+                                   min(np.sum((np.array(a) - point) ** 2) for a in arrangements))
+        self.assertEqual(aset.find_nearest_set_point(points[0]), nearest[0].tolist())
+
+        # the arrangements of all the elements are the permutations
+        aset, pset = ArrangementSet([1, 2, 2, 5]), PermutationSet([1, 2, 2, 5])
+        points = rng.randn(10, 4)
+        self.assertEqual(aset.find_nearest_set_points(points).tolist(), pset.find_nearest_set_points(points).tolist())
+        self.assertEqual(aset.find_min_of_linear_functions(points).tolist(),
+                         pset.find_min_of_linear_functions(points).tolist())
+        self.assertRaises(ValueError, ArrangementSet, [1, 2], 3)
+
+    def test_multiset_permutations(self):
+        """
+        Verify each permutation of the multiset is enumerated once
+        """
+        mset = MultisetPermutationSet([2, 1, 2, 3, 1])
+        permutations = list(mset)
+        self.assertEqual(permutations, sorted(set(PermutationSet([2, 1, 2, 3, 1]))))
+        self.assertEqual(len(mset), 30)
+        self.assertMinimum(mset, (3, -1, 0, 2, -2))
+        self.assertTrue(all(tuple(p) in permutations for p in mset.sample(10, np.random.RandomState(0)).tolist()))
+
+    def test_combinations(self):
+        """
+        Verify the combinations are the incidence vectors of the subsets of k elements
+        """
+        cset = CombinationSet([5, 1, 4, 2, 3], 2)
+        combinations = list(cset)
+        self.assertEqual(len(cset), 10)
+        self.assertEqual(sorted(cset.get_subset(c) for c in combinations),
+                         [[1, 2], [1, 3], [1, 4], [1, 5], [2, 3], [2, 4], [2, 5], [3, 4], [3, 5], [4, 5]])
+
+        self.assertMinimum(cset, (3, -1, 0, 2, -2))
+        self.assertEqual(cset.find_min_of_linear_function((3, -1, 0, 2, -2)), [0, 1, 0, 0, 1])
+        self.assertEqual(cset.find_nearest_set_point((0.2, 0.9, 0.1, 0.7, 0.3)), [0, 1, 0, 1, 0])
+        self.assertRaises(ValueError, CombinationSet, [1, 2], 3)
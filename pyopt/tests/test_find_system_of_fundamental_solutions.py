@@ -2,6 +2,7 @@ __author__ = 'Alex Baranov'
 
 
 import unittest
+import itertools
 from time import *
 import numpy as np
 
@@ -68,5 +69,247 @@ class TestFind_system_of_fundamental_solutions(unittest.TestCase):
                               [  1.,   1.,   1.,   1.,   1.]])
         self.assertTrue(np.array_equal(expected2, np.array(result2)))
 
+    def test_main_column_strategies(self):
+        """
+        Verify all the main column strategies give the same fundamental system
+        """
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        expected = set(map(tuple, c.find_sfs_of_even_inequalities_system(sys2)))
+
+        for strategy in ("first", "min_product", "fewest_rows"):
+            stats = c.SolverStats()
+            result = c.find_sfs_of_even_inequalities_system(sys2, main_column_strategy=strategy, stats=stats)
+            self.assertEqual(expected, set(map(tuple, result)))
+            self.assertTrue(len(stats.steps) > 0)
+            for step in stats.steps:
+                self.assertTrue(step.predicted_rows >= step.actual_rows)
+                if strategy == "fewest_rows":
+                    self.assertEqual(step.predicted_rows, step.actual_rows)
+
+        self.assertRaises(ValueError, c.find_sfs_of_even_inequalities_system, sys2, main_column_strategy="last")
+
+    def test_two_variables_system(self):
+        """
+        Verify the fundamental system of the system with two variables includes all the extreme rays
+        """
+        result = c.find_sfs_of_even_inequalities_system([[-3, 0, 4], [-3, -3, 3]])
+        expected = set([(4., 0., 3.), (0., 1., 0.), (1., 0., 0.)])
+        self.assertEqual(expected, set(map(tuple, result)))
+
+    def get_extreme_rays(self, system):
+        """
+        Gets the normalized extreme rays of the cone x >= 0, system * x <= 0 by checking
+        every (n - 1) active constraints.
+        """
+        constraints = np.vstack((np.array(system, dtype=float), -np.eye(len(system[0]))))
+        rays = set()
+        for rows in itertools.combinations(range(len(constraints)), len(system[0]) - 1):
+            active = constraints[list(rows)]
+            if np.linalg.matrix_rank(active) != len(system[0]) - 1:
+                continue
+
+            ray = np.linalg.svd(active)[2][-1]
+            for r in (ray, -ray):
+                if np.all(np.dot(constraints, r) <= 1e-9):
+                    rays.add(tuple(np.round(r / np.abs(r).max(), 6)))
+        return rays
+
+    def test_extreme_rays(self):
+        """
+        Verify the fundamental system includes all the extreme rays found by the brute force
+        """
+        for seed in range(100):
+            rng = np.random.RandomState(seed)
+            system = rng.randint(-5, 6, (rng.randint(1, 5), rng.randint(2, 6))).tolist()
+            result = set(tuple(np.round(r / np.abs(r).max(), 6))
+                         for r in c.find_sfs_of_even_inequalities_system(system) if np.abs(r).max() > 0)
+            self.assertTrue(self.get_extreme_rays(system) <= result, system)
+
+    def test_incremental_solution(self):
+        """
+        Verify the solver updates the fundamental system when the constraints are appended or the last one is replaced
+        """
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        solver = c.InequalitiesSolver()
+        solver.cache = None
+        solver.find_foundamental_system_of_solution(sys2[:3])
+        full_steps = len(solver.last_stats.steps)
+
+        result = solver.find_foundamental_system_of_solution(sys2[:4])
+        self.assertTrue(len(solver.last_stats.steps) < full_steps)
+        expected = c.find_sfs_of_even_inequalities_system(sys2[:4])
+        self.assertEqual(set(map(tuple, expected)), set(map(tuple, result)))
+
+        # replace the last constraint
+        result = solver.find_foundamental_system_of_solution(sys2[:3] + sys2[4:])
+        expected = c.find_sfs_of_even_inequalities_system(sys2[:3] + sys2[4:])
+        self.assertEqual(set(map(tuple, expected)), set(map(tuple, result)))
+
+    def test_get_solutions(self):
+        """
+        Verify the batch of random solutions agrees with the system and is reproducible
+        """
+        system = [[-1, 0, 0, 1], [0, -1, 0, 1], [0, 0, -1, 1], [1, 1, 1, -6]]
+        a = np.array(system, dtype=float)
+        solver = c.InequalitiesSolver()
+
+        # the integer weights give the same points as the single solutions
+        rng = np.random.RandomState(1)
+        expected = [solver.get_solution(system, rng=rng) for _ in range(5)]
+        result = solver.get_solutions(system, 5, rng=np.random.RandomState(1))
+        self.assertTrue(np.array_equal(expected, result))
+
+        # the provided weights give the same point as the batch with the same weights
+        p = np.random.RandomState(3).dirichlet(np.ones(len(solver.last_found_fundamental_system)), size=2)
+        self.assertTrue(np.array_equal(solver.get_solution(system, p=p[1]), c._combine_solutions(
+            solver.last_found_fundamental_system.astype(float), p)[1]))
+
+        for weights in ("integer", "dirichlet", "sparse"):
+            points = solver.get_solutions(system, 100, rng=np.random.RandomState(2), weights=weights)
+            self.assertEqual(points.shape, (100, 3))
+            self.assertTrue(np.all(np.dot(points, a[:, :-1].T) + a[:, -1] <= 1e-9))
+
+            same_points = solver.get_solutions(system, 100, rng=np.random.RandomState(2), weights=weights)
+            self.assertTrue(np.array_equal(points, same_points))
+
+        self.assertRaises(ValueError, solver.get_solutions, system, 1, weights="normal")
+
+    def test_redundant_solutions_removal(self):
+        """
+        Verify the not extreme solutions are removed from the fundamental system
+        """
+        system = [[1, -1, 0, 0], [-1, 1, 0, 0]]
+        fundamental_system = np.array([[0, 0, 1, 0], [0, 0, 0, 1], [1, 1, 0, 0], [2, 2, 3, 0], [1, 1, 1, 1]])
+        result, removed = c.remove_redundant_solutions(fundamental_system, system)
+        self.assertEqual(removed, 2)
+        self.assertTrue(np.array_equal(fundamental_system[:3], result))
+
+        result, removed = c.remove_redundant_solutions(fundamental_system, system, exact=True)
+        self.assertEqual(removed, 2)
+
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        stats = c.SolverStats()
+        result = c.find_sfs_of_even_inequalities_system(sys2, remove_redundant=True, stats=stats)
+        self.assertTrue(np.array_equal(c.find_sfs_of_even_inequalities_system(sys2, deduplicate=False), result))
+        self.assertEqual(stats.redundant_removed, 0)
+        self.assertEqual(sum(step.duplicates_removed for step in stats.steps), 0)
+
+    def test_elimination_callback(self):
+        """
+        Verify the callback receives the info of each elimination step
+        """
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        steps = []
+        stats = c.SolverStats()
+        result = c.find_sfs_of_even_inequalities_system(sys2, stats=stats, callback=steps.append)
+
+        self.assertEqual(steps, stats.steps)
+        self.assertEqual([step.index for step in steps], range(len(steps)))
+        self.assertEqual(steps[-1].rows_out, len(result))
+        for previous, step in zip(steps, steps[1:]):
+            self.assertEqual(previous.rows_out, step.rows_in)
+        for step in steps:
+            self.assertTrue(step.pairs_accepted <= step.pairs_considered)
+            self.assertEqual(step.actual_rows, step.rows_out + step.duplicates_removed)
+            self.assertTrue(step.elapsed >= 0)
+
+        records = stats.to_records()
+        self.assertEqual(records[0]["main_column"], steps[0].main_column)
+        self.assertEqual(stats.get_max_rows(), max([steps[0].rows_in] + [step.rows_out for step in steps]))
+
+        solver = c.InequalitiesSolver(callback=steps.append, cache=c.FundamentalSystemCache())
+        del steps[:]
+        solver.find_foundamental_system_of_solution(sys2)
+        self.assertEqual(steps, solver.last_stats.steps)
+
+        equation_steps = []
+        c.find_sfs_of_equation_system([[-5, -5, 6, -8, -10, 0], [0, -5, 3, 1, 0, -10]],
+                                      callback=equation_steps.append)
+        self.assertEqual(len(equation_steps), 2)
+
+    @unittest.skipIf(c.sparse is None, "scipy is not installed")
+    def test_sparse_system(self):
+        """
+        Verify the sparse constraints systems give the same fundamental systems as the dense ones
+        """
+        sys2 = np.array([[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3],
+                         [1, 1, -3, 2, -1]])
+        sparse_sys2 = c.sparse.csr_matrix(sys2)
+        for strategy in c.MAIN_COLUMN_STRATEGIES:
+            expected = c.find_sfs_of_even_inequalities_system(sys2, main_column_strategy=strategy)
+            result = c.find_sfs_of_even_inequalities_system(sparse_sys2, main_column_strategy=strategy)
+            self.assertTrue(np.array_equal(expected, result))
+
+        exact_result = c.find_sfs_of_even_inequalities_system(sparse_sys2, exact=True)
+        self.assertTrue(np.array_equal(c.find_sfs_of_even_inequalities_system(sys2), exact_result))
+
+        sys = [[-5, -5, 6, -8, -10, 0], [0, -5, 3, 1, 0, -10]]
+        self.assertTrue(np.array_equal(c.find_sfs_of_equation_system(sys),
+                                       c.find_sfs_of_equation_system(c.sparse.csc_matrix(sys))))
+
+        # the sparse system is solved incrementally
+        solver = c.InequalitiesSolver()
+        solver.cache = None
+        solver.find_foundamental_system_of_solution(sparse_sys2[:3])
+        result = solver.find_foundamental_system_of_solution(sparse_sys2)
+        self.assertTrue(np.array_equal(c.find_sfs_of_even_inequalities_system(sys2), result))
+        self.assertEqual(len(solver.get_solution(sparse_sys2)), sys2.shape[1] - 1)
+
+        extended = c.add_additional_constraints(sparse_sys2, np.array([1, 2, 3, 4]))
+        self.assertTrue(c.sparse.issparse(extended))
+        self.assertTrue(np.array_equal(extended.toarray(),
+                                       c.add_additional_constraints(sys2, np.array([1, 2, 3, 4]))))
+
+    def test_parallel_pairs_combination(self):
+        """
+        Verify the pairs combined by the processes pool give the same fundamental system
+        """
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        expected = c.find_sfs_of_even_inequalities_system(sys2)
+
+        threshold = c._PARALLEL_PAIRS_THRESHOLD
+        c._PARALLEL_PAIRS_THRESHOLD = 0
+        try:
+            result = c.find_sfs_of_even_inequalities_system(sys2, workers=2)
+            exact_result = c.find_sfs_of_even_inequalities_system(sys2, exact=True, workers=2)
+        finally:
+            c._PARALLEL_PAIRS_THRESHOLD = threshold
+
+        self.assertTrue(np.array_equal(expected, result))
+        self.assertTrue(np.array_equal(expected, exact_result))
+
+    def test_exact_mode(self):
+        """
+        Verify the exact integer mode gives the same fundamental systems
+        """
+        sys = [[-5, -5, 6, -8, -10, 0], [0, -5, 3, 1, 0, -10]]
+        result1 = c.find_sfs_of_equation_system(sys, exact=True)
+        self.assertEqual(result1.dtype, np.int64)
+        self.assertTrue(np.array_equal(c.find_sfs_of_equation_system(sys), result1))
+
+        sys2 = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3], [1, 1, -3, 2, -1]]
+        result2 = c.find_sfs_of_even_inequalities_system(sys2, exact=True)
+        self.assertEqual(result2.dtype, np.int64)
+        self.assertTrue(np.array_equal(c.find_sfs_of_even_inequalities_system(sys2), result2))
+
+        self.assertRaises(ValueError, c.find_sfs_of_even_inequalities_system, [[0.5, -1, 1]], exact=True)
+
+    def test_exact_mode_overflow(self):
+        """
+        Verify the exact integer mode falls back to Python integers when int64 overflows
+        """
+        coefs = np.array([[-1, 3, 3, 0, 1], [-1, 2, 4, -4, -2], [3, 3, 3, -1, -4],
+                          [4, 3, 3, -3, -3], [-1, -4, 4, 2, 0]], dtype=object)
+        powers = np.array([[13, 14, 10, 13, 15], [16, 12, 12, 15, 15], [12, 8, 10, 8, 15],
+                           [9, 15, 16, 12, 8], [9, 16, 10, 11, 9]], dtype=object)
+        sys = (coefs * 10 ** powers).tolist()
+        result = c.find_sfs_of_even_inequalities_system(sys, exact=True)
+        self.assertEqual(result.dtype, object)
+
+        # all the solutions should be exact
+        values = np.dot(result.astype(object), np.array(sys, dtype=object).T)
+        self.assertTrue((result >= 0).all())
+        self.assertTrue((values <= 0).all())
+
 if __name__ == '__main__':
     unittest.main()
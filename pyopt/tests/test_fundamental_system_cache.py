@@ -0,0 +1,147 @@
+__author__ = 'Alex Baranov'
+
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+from ..discrete.inequalities import chernikov as c
+from ..discrete.inequalities.cache import FundamentalSystemCache
+
+
+class TestFundamentalSystemCache(unittest.TestCase):
+    """
+    Tests for the FundamentalSystemCache
+    """
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lru_eviction(self):
+        """
+        Verify the least recently used systems are evicted when the memory budget is exceeded
+        """
+        cache = FundamentalSystemCache(max_bytes=2 * 8 * 4)
+        values = [np.full((2, 2), i, dtype=float) for i in range(3)]
+        keys = [cache.get_key([[i, 1]]) for i in range(3)]
+
+        cache.put(keys[0], values[0])
+        cache.put(keys[1], values[1])
+        self.assertTrue(np.array_equal(values[0], cache.get(keys[0])))
+
+        # the second system is the least recently used one now
+        cache.put(keys[2], values[2])
+        self.assertIsNone(cache.get(keys[1]))
+        self.assertTrue(np.array_equal(values[2], cache.get(keys[2])))
+
+        self.assertEqual(cache.evictions, 1)
+        self.assertEqual(cache.hits, 2)
+        self.assertEqual(cache.misses, 1)
+        self.assertEqual(cache.used_bytes, 2 * 8 * 4)
+
+    def test_keys(self):
+        """
+        Verify the key depends on the system content and options
+        """
+        key = FundamentalSystemCache.get_key([[1, 2], [3, 4]], False)
+        self.assertEqual(key, FundamentalSystemCache.get_key(np.array([[1, 2], [3, 4]]), False))
+        self.assertNotEqual(key, FundamentalSystemCache.get_key([[1, 2], [3, 5]], False))
+        self.assertNotEqual(key, FundamentalSystemCache.get_key([[1, 2], [3, 4]], True))
+
+        if c.sparse is not None:
+            sparse_key = FundamentalSystemCache.get_key(c.sparse.csr_matrix([[1, 0], [3, 4]]), False)
+            self.assertEqual(sparse_key, FundamentalSystemCache.get_key(c.sparse.coo_matrix([[1, 0], [3, 4]]), False))
+            self.assertNotEqual(sparse_key, FundamentalSystemCache.get_key(c.sparse.csr_matrix([[1, 0], [3, 5]]), False))
+
+    def test_persistent_store(self):
+        """
+        Verify the systems saved to the directory are loaded by the other cache instance
+        """
+        big = np.array([[2 ** 70, 1], [0, 3]], dtype=object)
+        FundamentalSystemCache(directory=self.directory).put("big", big)
+        FundamentalSystemCache(directory=self.directory).put("small", np.eye(2))
+
+        cache = FundamentalSystemCache(directory=self.directory)
+        loaded = cache.get("big")
+        self.assertEqual(loaded.dtype, object)
+        self.assertEqual(loaded.tolist(), big.tolist())
+        self.assertTrue(np.array_equal(np.eye(2), cache.get("small")))
+        self.assertEqual(cache.disk_hits, 2)
+
+    def test_solver_cache(self):
+        """
+        Verify the solvers share the cached fundamental systems
+        """
+        system = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0], [-3, 1, -1, 6, -3]]
+        cache = FundamentalSystemCache()
+        expected = c.InequalitiesSolver(cache=cache).find_foundamental_system_of_solution(system)
+        self.assertEqual(cache.misses, 1)
+
+        solver = c.InequalitiesSolver(cache=cache)
+        result = solver.find_foundamental_system_of_solution(system)
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(solver.last_stats.steps), 0)
+        self.assertTrue(np.array_equal(expected, result))
+
+    def test_incremental_solution_after_hit(self):
+        """
+        Verify the system that extends the cached one is solved incrementally after the cache hit
+        """
+        system = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0]]
+        extended = system + [[-3, 1, -1, 6, -3]]
+        cache = FundamentalSystemCache()
+        c.InequalitiesSolver(cache=cache).find_foundamental_system_of_solution(system)
+
+        solver = c.InequalitiesSolver(cache=cache)
+        solver.find_foundamental_system_of_solution(system)
+        self.assertEqual(cache.hits, 1)
+
+        result = solver.find_foundamental_system_of_solution(extended)
+        self.assertEqual(len(solver.last_stats.steps), 1)
+        reference = c.InequalitiesSolver(cache=None)
+        expected = reference.find_foundamental_system_of_solution(extended)
+        self.assertIsNone(reference.cache)
+        self.assertEqual(len(reference.last_stats.steps), 4)
+        self.assertEqual(set(map(tuple, expected)), set(map(tuple, result)))
+
+    def test_strategy_functions(self):
+        """
+        Verify the systems of the not registered strategy functions are not cached
+        """
+        system = [[1, -1, 3, -8, 5], [-1, 2, -1, 1, -1], [2, -1, -2, 1, 0]]
+        cache = FundamentalSystemCache()
+        for strategy in (lambda T2, is_adjacent: c._select_first_column(T2, is_adjacent),
+                         lambda T2, is_adjacent: c._select_fewest_rows_column(T2, is_adjacent)):
+            c.InequalitiesSolver(main_column_strategy=strategy, cache=cache).find_foundamental_system_of_solution(
+                system)
+        self.assertEqual((cache.hits, cache.misses, len(cache._items)), (0, 0, 0))
+
+        # the registered function shares the systems with its name
+        c.InequalitiesSolver(main_column_strategy="min_product", cache=cache).find_foundamental_system_of_solution(
+            system)
+        c.InequalitiesSolver(main_column_strategy=c.MAIN_COLUMN_STRATEGIES["min_product"],
+                             cache=cache).find_foundamental_system_of_solution(system)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_states_memory_budget(self):
+        """
+        Verify the elimination states are counted in the memory budget and evicted with the systems
+        """
+        cache = FundamentalSystemCache()
+        solver = c.InequalitiesSolver(cache=cache)
+        fundamental_system = solver.find_foundamental_system_of_solution([[1, -1, 3], [-1, 2, -1]])
+        state = solver._states[-1][1]
+        self.assertEqual(cache.used_bytes, fundamental_system.nbytes + state.nbytes)
+
+        cache.max_bytes = fundamental_system.nbytes
+        cache.put("other", fundamental_system)
+        self.assertEqual(list(cache._items), ["other"])
+        self.assertEqual(cache._states, {})
+        self.assertEqual(cache.used_bytes, fundamental_system.nbytes)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+__author__ = 'Alex Baranov'
+
+import unittest
+import numpy as np
+
+from ..discrete import randomsearch as rs
+from ..discrete.permutations import PermutationSet
+from ..discrete.linear_branch_and_bound import find_minimum_with_branch_and_bound
+
+
+class TestLinearBranchAndBound(unittest.TestCase):
+    """
+    Tests for the branch and bound search of the linear function minimum on the permutations
+    """
+
+    def setUp(self):
+        self.system = [[1, -2, 3, 1, -2, -1, 0], [-4, 1, 1, 2, 0, 1, -3]]
+        self.func = (-1, 1, 2, -3, 1, 2)
+        self.pset = PermutationSet(range(1, 7))
+
+    def test_exact_minimum(self):
+        """
+        Verify both nodes orders find the minimum found by the exhaustive search
+        """
+        _, expected = rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset)
+        for order in ("best", "depth"):
+            result = find_minimum_with_branch_and_bound(self.func, self.system, self.pset, order)
+            self.assertTrue(result.optimal)
+            self.assertEqual(result.func_value, expected)
+            self.assertEqual(result.gap, 0)
+            self.assertTrue(rs.is_solution(self.system, result.point))
+
+        # the set with the repeated elements
+        rng = np.random.RandomState(0)
+        pset = PermutationSet([0, 1, 1, 2, 2, 2, 3])
+        system = [rng.randint(-5, 6, 7).tolist() + [-12] for _ in range(3)]
+        func = rng.randint(-3, 4, 7).tolist()
+        _, expected = rs.find_minimum_with_exhaustive_search(func, system, pset)
+        self.assertEqual(find_minimum_with_branch_and_bound(func, system, pset, "depth").func_value, expected)
+
+    def test_limits(self):
+        """
+        Verify the stopped search reports the lower bound of the minimum
+        """
+        _, expected = rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset)
+        result = find_minimum_with_branch_and_bound(self.func, self.system, self.pset, "depth", node_limit=3)
+        self.assertFalse(result.optimal)
+        self.assertEqual(result.nodes, 3)
+        self.assertTrue(result.lower_bound <= expected)
+        if result.point is not None:
+            self.assertEqual(result.gap, result.func_value - result.lower_bound)
+
+        result = find_minimum_with_branch_and_bound(self.func, self.system + [[0] * 6 + [1]], self.pset)
+        self.assertEqual((result.point, result.optimal), (None, True))
+        self.assertRaises(ValueError, find_minimum_with_branch_and_bound, self.func, self.system, self.pset, "wide")
@@ -0,0 +1,90 @@
+__author__ = 'Alex Baranov'
+
+import unittest
+import numpy as np
+
+from ..discrete import randomsearch as rs
+from ..discrete import localsearch as ls
+from ..discrete.permutations import PermutationSet
+from ..discrete.cycle_permutations import CyclePermutationSet
+from ..discrete.arrangements import ArrangementSet
+from ..discrete.combinations import CombinationSet
+
+
+class TestLocalSearch(unittest.TestCase):
+    """
+    Tests for the local search refinement of the permutations
+    """
+
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        n = 8
+        self.pset = PermutationSet(range(1, n + 1))
+        self.system = [row + [-int(np.dot(row, range(1, n + 1)))] for row in rng.randint(-5, 6, (4, n)).tolist()]
+        self.func = tuple(rng.randint(-9, 10, n).tolist())
+
+    def test_moves_changes(self):
+        """
+        Verify the incremental changes of the moves are equal to the changes of the recalculated values
+        """
+        rng = np.random.RandomState(1)
+        x = np.array([3, 1, 4, 1, 5, 9, 2, 6])
+        coefs = rng.randn(3, len(x))
+        moves, changes = ls._get_moves(x, coefs, ls.NEIGHBORHOODS)
+        self.assertEqual(len(moves), len(changes))
+        for move, change in zip(moves, changes):
+            self.assertTrue(np.allclose(np.dot(coefs, ls._make_move(x, move)) - np.dot(coefs, x), change))
+
+    def test_refine_point(self):
+        """
+        Verify the refinement repairs the invalid permutations and does not worsen the valid ones
+        """
+        rng = np.random.RandomState(2)
+        repaired = 0
+        for _ in range(10):
+            point = rng.permutation(range(1, 9)).tolist()
+            value = sum(i * j for i, j in zip(self.func, point))
+            refined, refined_value, valid = ls.refine_point(point, self.func, self.system)
+
+            self.assertEqual(sorted(refined), range(1, 9))
+            self.assertEqual(valid, rs.is_solution(self.system, refined))
+            self.assertEqual(refined_value, sum(i * j for i, j in zip(self.func, refined)))
+            if rs.is_solution(self.system, point):
+                self.assertTrue(valid and refined_value <= value)
+            else:
+                repaired += valid
+        self.assertTrue(repaired > 0)
+
+        point = rng.permutation(range(1, 9)).tolist()
+        self.assertEqual(ls.refine_point(point, self.func, self.system, max_moves=0)[0], point)
+        self.assertRaises(ValueError, ls.refine_point, point, self.func, self.system, ("rotation",))
+
+    def test_find_minimum_with_refinement(self):
+        """
+        Verify the refined search finds the valid points and gives the same results in the batch mode
+        """
+        _, exact_value = rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset)
+        for seed in range(3):
+            point, refined_value = rs.find_minimum(self.func, self.system, self.pset, rng=np.random.RandomState(seed),
+                                                   refine=True)
+            self.assertEqual((point, refined_value),
+                             rs.find_minimum(self.func, self.system, self.pset, rng=np.random.RandomState(seed),
+                                             batch=True, refine=True))
+            self.assertTrue(rs.is_solution(self.system, point))
+            self.assertTrue(exact_value <= refined_value)
+
+    def test_refinement_keeps_set_points(self):
+        """
+        Verify the refined points stay in the set and the sets without the moves are rejected
+        """
+        system = [[1, -2, 3, 1, -1, 0], [-4, 1, 1, 2, 0, 1]]
+        func = (-1, 1, 2, -2, 1)
+        for pset in (ArrangementSet(range(1, 8), 5), CombinationSet(range(1, 6), 2)):
+            elements = set(map(tuple, pset))
+            for seed in range(3):
+                point, _ = rs.find_minimum(func, system, pset, add_constraints=False, rng=np.random.RandomState(seed),
+                                           refine=True)
+                self.assertTrue(point is None or tuple(point) in elements)
+
+        cycles = CyclePermutationSet(range(1, 6))
+        self.assertRaises(ValueError, rs.find_minimum, func, system, cycles, refine=True)
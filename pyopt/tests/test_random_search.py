@@ -0,0 +1,190 @@
+__author__ = 'Alex Baranov'
+
+import unittest
+import numpy as np
+
+from ..discrete import randomsearch as rs
+from ..discrete.permutations import PermutationSet
+from ..discrete.cycle_permutations import CyclePermutationSet
+from ..discrete.constraint_system import ConstraintSystem
+from ..discrete.evaluation_cache import EvaluationCache
+
+
+class TestRandomSearch(unittest.TestCase):
+    """
+    Tests for the random search on the combinatorial sets
+    """
+
+    def setUp(self):
+        self.system = [[1, -2, 3, 1, -2, -1, 0], [-4, 1, 1, 2, 0, 1, -3]]
+        self.func = (-1, 1, 2, -3, 1, 2)
+        self.pset = PermutationSet(range(1, 7))
+
+    def test_find_minimum(self):
+        """
+        Verify the random search finds the valid point with the found function value
+        """
+        point, func_value = rs.find_minimum(self.func, self.system, self.pset, rng=np.random.RandomState(0))
+        exact_point, exact_value = rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset)
+
+        self.assertTrue(rs.is_solution(self.system, point))
+        self.assertEqual(func_value, sum(i * j for i, j in zip(self.func, point)))
+        self.assertTrue(func_value >= exact_value)
+
+    def test_batch_experiments(self):
+        """
+        Verify the batch experiments give the same results as the experiments run one by one
+        """
+        for seed in range(5):
+            expected = rs.find_minimum(self.func, self.system, self.pset, experiments_per_series=20,
+                                       rng=np.random.RandomState(seed))
+            result = rs.find_minimum(self.func, self.system, self.pset, experiments_per_series=20,
+                                     rng=np.random.RandomState(seed), batch=True)
+            self.assertEqual(expected, result)
+            self.assertEqual([type(x) for x in result[0]], [type(x) for x in expected[0]])
+            self.assertTrue(all(type(x) is int for x in result[0]))
+
+    def test_constraint_system(self):
+        """
+        Verify the constraint system checks many points at once and appends the cuts in place
+        """
+        system = ConstraintSystem(self.system)
+        self.assertEqual(system.shape, (2, 7))
+        self.assertTrue(np.array_equal(np.array(system), self.system))
+        self.assertTrue(system.A.flags.c_contiguous)
+
+        points = np.array(list(self.pset))
+        a = np.array(self.system)
+        expected = [bool(np.all(np.dot(a[:, :-1], p) + a[:, -1] <= 0)) for p in points]
+        self.assertEqual(system.check(points).tolist(), expected)
+        self.assertEqual([rs.is_solution(system, p) for p in points], expected)
+        self.assertTrue(np.array_equal(system.get_slack(points), -np.dot(points, a[:, :-1].T) - a[:, -1]))
+
+        for value in range(10):
+            system.append(self.func + (-value,))
+        self.assertEqual(len(system), 12)
+        self.assertEqual(system.tolist()[-1], list(self.func) + [-9])
+        system.insert(2, [0] * 6 + [1])
+        self.assertFalse(system.check(points).any())
+
+        # the search does not change the given system
+        system = ConstraintSystem(self.system)
+        rs.find_minimum(self.func, system, self.pset, rng=np.random.RandomState(0))
+        self.assertEqual(len(system), 2)
+        self.assertEqual(rs.find_minimum_with_exhaustive_search(self.func, system, self.pset),
+                         rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset))
+
+    def test_find_minimum_parallel(self):
+        """
+        Verify the parallel chains are reproducible and give the best of their values
+        """
+        point, func_value, stats = rs.find_minimum_parallel(self.func, self.system, self.pset, workers=2, seed=3,
+                                                            experiments_per_series=10, share_best=False)
+        self.assertEqual([chain["chain"] for chain in stats], [0, 1])
+        self.assertEqual(func_value, min(chain["best_func_value"] for chain in stats))
+
+        # each chain is the random search with its own generator
+        for chain in stats:
+            expected = rs.find_minimum(self.func, self.system, self.pset, experiments_per_series=10,
+                                       rng=rs._get_chain_rng(3, chain["chain"]), batch=True)
+            self.assertEqual(expected, (chain["best_point"], chain["best_func_value"]))
+            self.assertEqual(chain["experiments"], 30)
+
+        point, func_value, stats = rs.find_minimum_parallel(self.func, self.system, self.pset, workers=2, seed=3,
+                                                            experiments_per_series=10)
+        self.assertTrue(rs.is_solution(self.system, point))
+        self.assertEqual(func_value, sum(i * j for i, j in zip(self.func, point)))
+
+    def test_iterate_minimum(self):
+        """
+        Verify the anytime search yields the improving points until the stop condition is met
+        """
+        incumbents = list(rs.iterate_minimum(self.func, self.system, self.pset, max_evaluations=95,
+                                             experiments_per_series=10, rng=np.random.RandomState(0)))
+        self.assertTrue(len(incumbents) > 0)
+        values = [incumbent.func_value for incumbent in incumbents]
+        self.assertEqual(values, sorted(set(values), reverse=True))
+        self.assertTrue(incumbents[-1].evaluations <= 95)
+        for incumbent in incumbents:
+            self.assertTrue(rs.is_solution(self.system, incumbent.point))
+
+        # the same generator gives the same best point as the search of the same number of series
+        expected = rs.find_minimum(self.func, self.system, self.pset, series_count=10, experiments_per_series=10,
+                                   rng=np.random.RandomState(0), batch=True)
+        result = list(rs.iterate_minimum(self.func, self.system, self.pset, max_evaluations=100,
+                                         experiments_per_series=10, rng=np.random.RandomState(0)))[-1]
+        self.assertEqual(expected, (result.point, result.func_value))
+
+        class Cancel(object):
+            def is_set(self):
+                return True
+
+        search = rs.iterate_minimum(self.func, self.system, self.pset, cancel=Cancel(), experiments_per_series=50,
+                                    rng=np.random.RandomState(0))
+        self.assertTrue(len(list(search)) <= 1)
+
+        search = rs.iterate_minimum(self.func, self.system, self.pset, stall_series=2, rng=np.random.RandomState(0))
+        for incumbent in search:
+            pass
+        self.assertEqual(list(rs.iterate_minimum(self.func, self.system, self.pset, max_evaluations=0)), [])
+
+    def test_exhaustive_search(self):
+        """
+        Verify the exhaustive search by blocks and by prefixes finds the first minimal valid element
+        """
+        valid = [(p, sum(i * j for i, j in zip(self.func, p))) for p in self.pset if rs.is_solution(self.system, p)]
+        expected = min(valid, key=lambda x: x[1])
+        for block_size in (1, 7, 720):
+            self.assertEqual(rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset, block_size),
+                             expected)
+        self.assertEqual(rs.find_minimum_with_exhaustive_search(self.func, self.system, self.pset, 50, workers=2),
+                         expected)
+
+        # the blocks of all the prefixes give the permutations in the order of the set iterator
+        pset = PermutationSet([1, 2, 2, 3, 4])
+        blocks = [block for prefix in pset.get_prefixes(9) for block in pset.iterate_blocks(5, prefix)]
+        self.assertEqual(np.vstack(blocks).tolist(), [list(p) for p in pset])
+        self.assertTrue(all(len(block) <= 5 for block in blocks))
+
+        self.assertRaises(ValueError, rs.find_minimum_with_exhaustive_search, self.func,
+                          self.system + [[0] * 6 + [1]], self.pset)
+
+    def test_evaluation_cache(self):
+        """
+        Verify the cached evaluations are equal to the new ones after the constraints are appended
+        """
+        system = ConstraintSystem(self.system)
+        points = np.array(list(self.pset))[::7]
+        points = np.vstack((points, points[:10]))
+        cache = EvaluationCache(max_size=1000)
+
+        valid, func_values, new_points = rs._evaluate_points(points, system, self.func, cache)
+        self.assertEqual(new_points, len(points) - 10)
+        self.assertEqual(valid, system.check(points).tolist())
+        self.assertEqual(func_values, [sum(i * j for i, j in zip(self.func, p)) for p in points])
+        self.assertEqual(cache.hits, 10)
+
+        system.append(self.func + (-5,))
+        self.assertEqual(rs._evaluate_points(points, system, self.func, cache)[:2],
+                         rs._evaluate_points(points, system, self.func, EvaluationCache())[:2])
+        self.assertEqual(cache.misses, len(points) - 10)
+        self.assertTrue(0 < cache.get_hit_rate() < 1)
+
+        cache = EvaluationCache(max_size=5)
+        rs._evaluate_points(points, system, self.func, cache)
+        self.assertEqual(len(cache), 5)
+        self.assertEqual(cache.evictions, len(points) - 15)
+
+        # the search with the neighbours of the stalled series keeps the points in the given cache
+        cache = EvaluationCache()
+        point, func_value = rs.find_minimum(self.func, self.system, self.pset, series_count=6, batch=True,
+                                           rng=np.random.RandomState(0), cache=cache, neighbors_on_stall=True)
+        self.assertTrue(rs.is_solution(self.system, point))
+        self.assertTrue(tuple(point) in cache)
+
+        # the neighbours are given by the set, so they stay in the set of the cyclic permutations
+        cycles = CyclePermutationSet(range(1, 6))
+        for seed in range(5):
+            point, func_value = rs.find_minimum((-1, 1, 2, -2, 1), [[1, -2, 3, 1, -1, 0], [-4, 1, 1, 2, 0, 1]],
+                                               cycles, rng=np.random.RandomState(seed), neighbors_on_stall=True)
+            self.assertTrue(point is None or tuple(point) in set(cycles))